@@ -0,0 +1,276 @@
+"""
+Лабораторная работа 4: Базовые растровые алгоритмы
+Замеры производительности алгоритмов растеризации
+
+    python benchmark.py                              # полный прогон, результат в bench_results.json
+    python benchmark.py --quick -o new.json          # сокращенный набор
+    python benchmark.py --compare old.json new.json  # сравнение двух прогонов
+"""
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from raster import RasterAlgorithms, np
+
+# Алгоритм -> (вид примитива, функция)
+ALGORITHMS: Dict[str, Tuple[str, Callable]] = {
+    "step": ("line", RasterAlgorithms.step_by_step),
+    "dda": ("line", RasterAlgorithms.dda),
+    "bresenham_line": ("line", RasterAlgorithms.bresenham_line),
+    "bresenham_circle": ("circle", RasterAlgorithms.bresenham_circle),
+    "step_fixed": ("line", RasterAlgorithms.step_by_step_fixed),
+    "dda_fixed": ("line", RasterAlgorithms.dda_fixed),
+}
+DEFAULT_ALGORITHMS = ("step", "dda", "bresenham_line", "bresenham_circle")
+
+LENGTHS = (10, 100, 1000, 10000)
+SLOPES = (0.0, 0.25, 0.5, 1.0)  # отношение малой оси к большой
+RADII = (5, 50, 500, 5000)
+
+QUICK_LENGTHS = (10, 1000)
+QUICK_SLOPES = (0.0, 0.5)
+QUICK_RADII = (5, 500)
+
+# Минимальное время одного замера, чтобы короткие примитивы не тонули в шуме таймера
+MIN_SAMPLE_TIME = 0.02
+
+
+def line_cases(lengths, slopes) -> List[dict]:
+    # Отрезки из начала координат во все восемь октантов: октант задается
+    # знаками приращений и тем, какая ось главная
+    cases = []
+    for length in lengths:
+        for slope in slopes:
+            major, minor = length, round(length * slope)
+            for octant in range(8):
+                sx = -1 if octant in (2, 3, 4, 5) else 1
+                sy = -1 if octant >= 4 else 1
+                dx, dy = (minor, major) if octant in (1, 2, 5, 6) else (major, minor)
+                cases.append({"length": length, "slope": slope, "octant": octant,
+                              "args": (0, 0, sx * dx, sy * dy)})
+    return cases
+
+
+def circle_cases(radii) -> List[dict]:
+    return [{"radius": r, "args": (0, 0, r)} for r in radii]
+
+
+def measure_time(func: Callable, args: tuple, repeat: int) -> Tuple[List[float], int]:
+    # Время одного вызова по нескольким замерам; короткие вызовы повторяются
+    # в цикле, пока замер не станет достаточно длинным
+    pixels = len(func(*args))
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func(*args)
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_SAMPLE_TIME or loops >= 1 << 20:
+            break
+        loops *= 2
+
+    samples = [elapsed / loops]
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat - 1):
+            start = time.perf_counter()
+            for _ in range(loops):
+                func(*args)
+            samples.append((time.perf_counter() - start) / loops)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return samples, pixels
+
+
+def measure_memory(func: Callable, args: tuple) -> Tuple[int, int, int]:
+    # Пиковая память во время вызова, а также число блоков и байт, которые
+    # остаются занятыми результатом
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        result = func(*args)
+        current, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    del result
+    return peak - base, current - base, blocks
+
+
+def run_benchmark(algorithms, lengths, slopes, radii, repeat: int,
+                  progress=None) -> dict:
+    results = []
+    lines = line_cases(lengths, slopes)
+    circles = circle_cases(radii)
+
+    for name in algorithms:
+        kind, func = ALGORITHMS[name]
+        for case in (lines if kind == "line" else circles):
+            samples, pixels = measure_time(func, case["args"], repeat)
+            peak, retained, blocks = measure_memory(func, case["args"])
+            best = min(samples)
+            record = {key: value for key, value in case.items() if key != "args"}
+            record.update({
+                "algorithm": name,
+                "args": list(case["args"]),
+                "pixels": pixels,
+                "best_s": best,
+                "mean_s": sum(samples) / len(samples),
+                "ns_per_pixel": best / pixels * 1e9,
+                "mpixels_per_s": pixels / best / 1e6,
+                "peak_bytes": peak,
+                "retained_bytes": retained,
+                "retained_blocks": blocks,
+            })
+            results.append(record)
+            if progress:
+                progress(record)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "numpy": np.__version__ if np is not None else None,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def group_key(record: dict) -> tuple:
+    # Отрезки сводятся по длине (все наклоны и октанты), окружности по радиусу
+    return record["algorithm"], record.get("length") or record.get("radius")
+
+
+def summarize(results: List[dict]) -> Dict[tuple, dict]:
+    # Суммарное время и число пикселей по группе, а также максимальная пиковая память
+    groups: Dict[tuple, dict] = {}
+    for record in results:
+        group = groups.setdefault(group_key(record), {"pixels": 0, "time": 0.0, "peak": 0, "blocks": 0})
+        group["pixels"] += record["pixels"]
+        group["time"] += record["best_s"]
+        group["peak"] = max(group["peak"], record["peak_bytes"])
+        group["blocks"] = max(group["blocks"], record["retained_blocks"])
+    return groups
+
+
+def print_summary(data: dict, output=sys.stdout):
+    meta = data["meta"]
+    print(f"Python {meta['python']} ({meta['implementation']}), {meta['platform']}", file=output)
+    print(f"{'Алгоритм':<18}{'Размер':>8}{'Пикселей':>12}{'нс/пиксель':>13}"
+          f"{'Мпикс/с':>10}{'Пик, КБ':>11}{'Блоков':>9}", file=output)
+    for (name, size), group in summarize(data["results"]).items():
+        per_pixel = group["time"] / group["pixels"] * 1e9
+        print(f"{name:<18}{size:>8}{group['pixels']:>12}{per_pixel:>13.1f}"
+              f"{1e3 / per_pixel:>10.2f}{group['peak'] / 1024:>11.1f}{group['blocks']:>9}",
+              file=output)
+
+
+def compare(old: dict, new: dict, threshold: float, output=sys.stdout) -> int:
+    # Сравнение по группам: отношение времени на пиксель и пиковой памяти.
+    # Возвращает число групп, замедлившихся больше чем на threshold
+    old_groups = summarize(old["results"])
+    new_groups = summarize(new["results"])
+    regressions = 0
+
+    print(f"Было:  {old['meta']['timestamp']}  Python {old['meta']['python']}", file=output)
+    print(f"Стало: {new['meta']['timestamp']}  Python {new['meta']['python']}", file=output)
+    print(f"{'Алгоритм':<18}{'Размер':>8}{'нс/пикс было':>14}{'стало':>10}"
+          f"{'время':>9}{'память':>9}", file=output)
+    for key, group in new_groups.items():
+        if key not in old_groups:
+            continue
+        previous = old_groups[key]
+        old_time = previous["time"] / previous["pixels"] * 1e9
+        new_time = group["time"] / group["pixels"] * 1e9
+        time_ratio = new_time / old_time
+        memory_ratio = group["peak"] / previous["peak"] if previous["peak"] else 1.0
+        mark = ""
+        if time_ratio > 1 + threshold:
+            mark = "  медленнее"
+            regressions += 1
+        elif time_ratio < 1 - threshold:
+            mark = "  быстрее"
+        print(f"{key[0]:<18}{key[1]:>8}{old_time:>14.1f}{new_time:>10.1f}"
+              f"{time_ratio:>8.2f}x{memory_ratio:>8.2f}x{mark}", file=output)
+
+    missing = sorted(set(old_groups) - set(new_groups), key=str)
+    if missing:
+        print("Нет в новом прогоне: " + ", ".join(f"{name} {size}" for name, size in missing), file=output)
+    return regressions
+
+
+def load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Замеры производительности алгоритмов растеризации")
+    parser.add_argument("-a", "--algorithms", nargs="+", choices=sorted(ALGORITHMS),
+                        default=list(DEFAULT_ALGORITHMS), help="алгоритмы для замера")
+    parser.add_argument("-o", "--output", default="bench_results.json",
+                        help="файл для результатов в формате JSON")
+    parser.add_argument("-r", "--repeat", type=int, default=5,
+                        help="число замеров на каждый случай (берется лучший)")
+    parser.add_argument("--quick", action="store_true",
+                        help="сокращенный набор длин, наклонов и радиусов")
+    parser.add_argument("--compare", nargs="+", metavar="JSON",
+                        help="сравнить с прошлым прогоном; с двумя файлами замер не выполняется")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="доля замедления, считающаяся регрессией (по умолчанию 0.1)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.compare and len(args.compare) > 2:
+        print("Ошибка: --compare принимает один или два файла", file=sys.stderr)
+        return 2
+
+    if args.compare and len(args.compare) == 2:
+        old, new = load(args.compare[0]), load(args.compare[1])
+    else:
+        def progress(record):
+            size = record.get("length") or record.get("radius")
+            print(f"\r{record['algorithm']:<18}{size:>8}", end="", file=sys.stderr, flush=True)
+
+        new = run_benchmark(
+            args.algorithms,
+            QUICK_LENGTHS if args.quick else LENGTHS,
+            QUICK_SLOPES if args.quick else SLOPES,
+            QUICK_RADII if args.quick else RADII,
+            max(1, args.repeat), progress if sys.stderr.isatty() else None)
+        if sys.stderr.isatty():
+            print(file=sys.stderr)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(new, f, ensure_ascii=False, indent=1)
+        print_summary(new)
+        print(f"Результаты сохранены в {args.output}")
+        if not args.compare:
+            return 0
+        old = load(args.compare[0])
+
+    print()
+    return 1 if compare(old, new, args.threshold) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+Лабораторная работа 4: Базовые растровые алгоритмы
+Замер времени построения растра по фазам
+"""
+
+import cProfile
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+# Фазы построения в порядке выполнения
+PHASE_NAMES = {
+    "parse": "Разбор параметров",
+    "clip": "Отсечение",
+    "rasterize": "Растеризация",
+    "render": "Вывод на холст",
+    "info": "Информационная панель",
+}
+
+COUNTER_NAMES = {
+    "pixels": "Точек растра",
+    "cells": "Закрашенных клеток",
+    "changed": "Изменившихся клеток",
+    "puts": "Вызовов PhotoImage.put",
+    "full_renders": "Полных перерисовок",
+    "items": "Элементов на холсте",
+}
+
+
+class PhaseProfiler:
+    # Время фаз и счетчики по кадрам - одному построению растра или смене
+    # вида. Хранится не больше history последних кадров. По желанию на
+    # время фаз включается cProfile и tracemalloc (пиковая память фазы).
+
+    def __init__(self, history: int = 1000):
+        self.frames = deque(maxlen=history)
+        self.frame: Optional[dict] = None
+        self.profile: Optional[cProfile.Profile] = None
+        self.trace_memory = False
+        self.memory_started = False
+
+    def begin(self, label: str):
+        self.frame = {"label": label, "time": time.time(), "phases": {}, "counters": {}}
+        self.frames.append(self.frame)
+
+    def cancel(self):
+        # Кадр, в котором ничего не перестраивалось, не учитывается
+        if self.frame is not None and self.frames and self.frames[-1] is self.frame:
+            self.frames.pop()
+        self.frame = self.frames[-1] if self.frames else None
+
+    @contextmanager
+    def phase(self, name: str):
+        if self.frame is None:
+            self.begin("")
+        frame = self.frame
+        profile = self.profile
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        if profile is not None:
+            profile.enable()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if profile is not None:
+                profile.disable()
+            phases = frame["phases"]
+            phases[name] = phases.get(name, 0.0) + elapsed
+            if tracing:
+                peak = tracemalloc.get_traced_memory()[1] - base
+                memory = frame.setdefault("peak_bytes", {})
+                memory[name] = max(memory.get(name, 0), peak)
+
+    def count(self, name: str, value: int = 1):
+        if self.frame is None:
+            self.begin("")
+        counters = self.frame["counters"]
+        counters[name] = counters.get(name, 0) + value
+
+    def set_profiling(self, enabled: bool):
+        if enabled and self.profile is None:
+            self.profile = cProfile.Profile()
+        elif not enabled:
+            self.profile = None
+
+    def set_memory_tracing(self, enabled: bool):
+        # tracemalloc замедляет все выделения памяти, поэтому включается
+        # только по запросу и выключается, если его запустили здесь
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.memory_started = True
+        elif not enabled and self.memory_started:
+            tracemalloc.stop()
+            self.memory_started = False
+        self.trace_memory = enabled
+
+    def reset(self):
+        self.frames.clear()
+        self.frame = None
+        if self.profile is not None:
+            self.profile = cProfile.Profile()
+
+    def summary(self) -> Dict[str, dict]:
+        # Фаза -> число кадров с ней, суммарное, среднее и наибольшее время (с)
+        result = {}
+        for frame in self.frames:
+            for name, seconds in frame["phases"].items():
+                stats = result.setdefault(name, {"frames": 0, "total": 0.0, "max": 0.0})
+                stats["frames"] += 1
+                stats["total"] += seconds
+                stats["max"] = max(stats["max"], seconds)
+        for stats in result.values():
+            stats["mean"] = stats["total"] / stats["frames"]
+        return result
+
+    def report(self) -> List[str]:
+        # Строки для информационной панели: последний кадр и сводка по сессии
+        lines = []
+        frame = self.frame
+        if frame is not None:
+            total = sum(frame["phases"].values())
+            lines.append(f"Последнее построение: {total * 1000:.3f} мс")
+            for name, seconds in self._ordered(frame["phases"]):
+                share = seconds / total * 100 if total else 0.0
+                line = f"  {PHASE_NAMES.get(name, name)}: {seconds * 1000:.3f} мс ({share:.0f}%)"
+                if name in frame.get("peak_bytes", {}):
+                    line += f", пик {frame['peak_bytes'][name] / 1024:.1f} КБ"
+                lines.append(line)
+            for name, value in self._ordered(frame["counters"], COUNTER_NAMES):
+                lines.append(f"  {COUNTER_NAMES.get(name, name)}: {value}")
+
+        summary = self.summary()
+        if summary:
+            lines.append(f"За сессию, кадров: {len(self.frames)} (среднее / наибольшее):")
+            for name, stats in self._ordered(summary):
+                lines.append(f"  {PHASE_NAMES.get(name, name)}: "
+                             f"{stats['mean'] * 1000:.3f} / {stats['max'] * 1000:.3f} мс")
+        return lines
+
+    def profile_stats(self, limit: int = 30) -> List[dict]:
+        # Функции с наибольшим накопленным временем по данным cProfile
+        if self.profile is None:
+            return []
+        self.profile.create_stats()
+        stats = self.profile.stats
+        rows = []
+        for (filename, line, function), (_, calls, own, cumulative, _) in stats.items():
+            rows.append({"function": function, "file": filename, "line": line,
+                         "calls": calls, "tottime": own, "cumtime": cumulative})
+        rows.sort(key=lambda row: row["cumtime"], reverse=True)
+        return rows[:limit]
+
+    def export(self, path: str):
+        data = {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+            },
+            "summary": self.summary(),
+            "frames": list(self.frames),
+            "profile": self.profile_stats(),
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+
+    @staticmethod
+    def _ordered(items: dict, names: Dict[str, str] = PHASE_NAMES):
+        order = list(names)
+        return sorted(items.items(),
+                      key=lambda item: order.index(item[0]) if item[0] in order else len(order))
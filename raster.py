@@ -0,0 +1,2481 @@
+"""
+Лабораторная работа 4: Базовые растровые алгоритмы
+Реализация алгоритмов растеризации отрезков и окружностей
+"""
+
+import os
+import tempfile
+import math
+import sys
+from array import array
+from bisect import bisect_right, insort
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy нужен только для пакетной растеризации
+    np = None
+
+
+LINE_ALGORITHMS = ("step", "dda", "bresenham_line")
+
+# Область просмотра (x_min, y_min, x_max, y_max), границы включительно
+Viewport = Tuple[int, int, int, int]
+
+# Пакетная растеризация: точек в группе отрезков Брезенхема и наименьшее
+# число активных отрезков, при котором шаг step и dda идет общим циклом
+_BATCH_CHUNK_STEPS = 1 << 16
+_BATCH_MIN_ACTIVE = 32
+
+
+def _float_advance(value: float, increment: float, count: int) -> float:
+    # Результат count последовательных сложений value += increment в
+    # арифметике float без выполнения каждого сложения. Пока сумма остается
+    # в одном двоичном порядке, шаг сетки u постоянен и каждое сложение
+    # прибавляет одно и то же кратное u, так что серию можно пропустить
+    # разом. Результат совпадает с циклом бит в бит.
+    while count > 0:
+        if increment == 0.0:
+            return value
+        if abs(value) < 2.0 ** -1000:
+            value += increment
+            count -= 1
+            continue
+
+        _, exponent = math.frexp(value)
+        ulp = math.ldexp(1.0, exponent - 53)
+        units = increment / ulp
+        if units - math.floor(units) == 0.5:
+            # Округление к четному зависит от текущего значения - шагаем честно
+            value += increment
+            count -= 1
+            continue
+
+        grid_step = int(round(units))
+        if grid_step == 0:
+            return value
+
+        mantissa = int(value / ulp)
+        if mantissa > 0:
+            low, high = 2 ** 52 + 1, 2 ** 53 - 2
+        else:
+            low, high = -(2 ** 53) + 2, -(2 ** 52) - 1
+        if grid_step > 0:
+            jumps = (high - mantissa) // grid_step
+        else:
+            jumps = (mantissa - low) // -grid_step
+
+        if jumps < 1:
+            value += increment
+            count -= 1
+            continue
+
+        jumps = min(jumps, count)
+        value = math.ldexp(mantissa + jumps * grid_step, exponent - 53)
+        count -= jumps
+
+    return value
+
+
+def _monotone_range(f: Callable[[int], int], last: int, lo: int, hi: int,
+                    increasing: bool) -> Optional[Tuple[int, int]]:
+    # Диапазон k из [0, last], для которых lo <= f(k) <= hi, при условии
+    # что f монотонна по k. Ищется двоичным поиском за O(log last) вызовов f.
+    if not increasing:
+        lo, hi = -hi, -lo
+        g = f
+        f = lambda k: -g(k)
+
+    if f(last) < lo or f(0) > hi:
+        return None
+
+    left, right = 0, last
+    while left < right:
+        mid = (left + right) // 2
+        if f(mid) >= lo:
+            right = mid
+        else:
+            left = mid + 1
+    first = left
+
+    left, right = first, last
+    while left < right:
+        mid = (left + right + 1) // 2
+        if f(mid) <= hi:
+            left = mid
+        else:
+            right = mid - 1
+
+    if f(left) > hi:
+        return None
+    return first, left
+
+
+def _bresenham_minor_offset(k: int, major: int, minor: int) -> int:
+    # Смещение по неосновной оси на шаге k алгоритма Брезенхема:
+    # k * minor / major с округлением половины вниз
+    if major == 0:
+        return 0
+    q, r = divmod(k * minor, major)
+    return q + (2 * r > major)
+
+
+def _bresenham_state(x1: int, y1: int, x2: int, y2: int,
+                     k: int) -> Tuple[int, int, int]:
+    # (x, y, err) алгоритма bresenham_line перед шагом k
+    adx = abs(x2 - x1)
+    ady = abs(y2 - y1)
+    sx = 1 if x1 < x2 else -1
+    sy = 1 if y1 < y2 else -1
+
+    if adx >= ady:
+        m = _bresenham_minor_offset(k, adx, ady)
+        return x1 + sx * k, y1 + sy * m, adx - ady * (k + 1) + adx * m
+    m = _bresenham_minor_offset(k, ady, adx)
+    return x1 + sx * m, y1 + sy * k, adx - ady + adx * k - ady * m
+
+
+def _circle_decision(r: int, x: int, y: int) -> int:
+    # Параметр решения d алгоритма bresenham_circle в точке (x, y):
+    # это инвариант его рекуррентных обновлений
+    return 2 * x * x + 8 * x + 2 * y * y - 6 * y + 3 + 4 * r - 2 * r * r
+
+
+def _circle_closed_y(r: int, x: int) -> int:
+    # Решение d <= 0 в явном виде: y(x) = 1 + w, где w - наибольшее целое
+    # с (x + 1)^2 + (w - 1/2)^2 <= (r - 1)^2 + 15/4. Совпадает с циклом,
+    # пока y убывает не быстрее чем на 1 за шаг, то есть вдали от диагонали.
+    n = 4 * (r - 1) ** 2 + 15 - 4 * (x + 1) ** 2
+    return 1 + (math.isqrt(n) + 1) // 2
+
+
+def _circle_anchor(r: int) -> int:
+    # Последний столбец, для которого _circle_closed_y заведомо точна
+    if r < 5:
+        return 0
+    left, right = 0, r - 2
+    while left < right:
+        mid = (left + right + 1) // 2
+        if _circle_closed_y(r, mid) >= mid + 5:
+            left = mid
+        else:
+            right = mid - 1
+    return left
+
+
+def _circle_state(r: int, x: int, anchor: int) -> Tuple[int, int]:
+    # (y, d) алгоритма bresenham_circle в столбце x: до опорного столбца -
+    # в явном виде, после него - несколько обычных шагов
+    start = min(x, anchor)
+    y = r if start == 0 else _circle_closed_y(r, start)
+    d = _circle_decision(r, start, y)
+
+    for column in range(start + 1, x + 1):
+        if d > 0:
+            y -= 1
+            d = d + 4 * (column - y) + 10
+        else:
+            d = d + 4 * column + 6
+    return y, d
+
+
+def _circle_last_x(r: int, anchor: int) -> int:
+    # Последний столбец первого октанта, в котором еще y >= x
+    x = anchor
+    y, d = _circle_state(r, x, anchor)
+
+    while True:
+        if d > 0:
+            y -= 1
+            d = d + 4 * (x + 1 - y) + 10
+        else:
+            d = d + 4 * (x + 1) + 6
+        if y < x + 1:
+            return x
+        x += 1
+
+
+def _circle_octant(r: int, first: int, last: int, anchor: int,
+                   trace: Optional["RasterTrace"] = None) -> Tuple[List[int], List[int]]:
+    # Точки первого октанта для столбцов x из [first, last]: состояние
+    # восстанавливается для начального столбца, дальше - обычный шаг
+    xs = []
+    ys = []
+    x = first
+    y, d = _circle_state(r, x, anchor)
+
+    if trace is not None:
+        # Первые шаги - с записью x, y и параметра решения d
+        trace.total += max(0, last - first + 1)
+        trace_x, trace_y, trace_d = (trace.columns[name] for name in ("x", "y", "d"))
+        stop = min(last + 1, x + trace.room())
+        while x < stop:
+            trace_x.append(x)
+            trace_y.append(y)
+            trace_d.append(d)
+            xs.append(x)
+            ys.append(y)
+            x += 1
+
+            if d > 0:
+                y -= 1
+                d = d + 4 * (x - y) + 10
+            else:
+                d = d + 4 * x + 6
+
+    while x <= last:
+        xs.append(x)
+        ys.append(y)
+        x += 1
+
+        if d > 0:
+            y -= 1
+            d = d + 4 * (x - y) + 10
+        else:
+            d = d + 4 * x + 6
+
+    return xs, ys
+
+
+def _iter_octant(r: int, first: int, last: int, anchor: int,
+                 reverse: bool) -> Iterator[Tuple[int, int]]:
+    # Ленивый вариант _circle_octant. В обратном направлении шаг идет по
+    # явной формуле y(x - 1), а несколько столбцов за опорным, где она
+    # неточна, вычисляются заранее.
+    if not reverse:
+        x = first
+        y, d = _circle_state(r, x, anchor)
+        while x <= last:
+            yield x, y
+            x += 1
+            if d > 0:
+                y -= 1
+                d = d + 4 * (x - y) + 10
+            else:
+                d = d + 4 * x + 6
+        return
+
+    tail_first = max(first, anchor + 1)
+    if last >= tail_first:
+        xs, ys = _circle_octant(r, tail_first, last, anchor)
+        for i in range(len(xs) - 1, -1, -1):
+            yield xs[i], ys[i]
+
+    x = min(last, anchor)
+    if x < first:
+        return
+    y = _circle_state(r, x, anchor)[0]
+    limit = 4 * (r - 1) ** 2 + 15
+
+    while True:
+        yield x, y
+        if x == first:
+            return
+        if 4 * x * x + (2 * y - 1) ** 2 <= limit:
+            y += 1
+        x -= 1
+
+
+# Восемь симметричных ветвей окружности в порядке обхода контура, начиная
+# с точки (xc, yc + r). (sx, sy, swap) задают точку (xc + sx * u, yc + sy * v),
+# где (u, v) = (y, x) при swap, иначе (x, y); reverse - ветвь проходится от
+# диагонали к оси. skip_axis и skip_diagonal исключают столбец x = 0 и
+# диагональную точку x = y, которые уже выданы соседней ветвью.
+CIRCLE_OCTANTS = (
+    # sx, sy, swap, reverse, skip_axis, skip_diagonal
+    (1, 1, False, False, False, False),
+    (1, 1, True, True, False, True),
+    (1, -1, True, False, True, False),
+    (1, -1, False, True, False, True),
+    (-1, -1, False, False, True, False),
+    (-1, -1, True, True, False, True),
+    (-1, 1, True, False, True, False),
+    (-1, 1, False, True, True, True),
+)
+
+
+def _octant_columns(octant: Tuple, last: int, diagonal: bool) -> Tuple[int, int]:
+    # Столбцы первого октанта, которые ветвь выдает без повторов
+    first = 1 if octant[4] else 0
+    end = last - 1 if octant[5] and diagonal else last
+    return first, end
+
+
+def _octant_points(xc: int, yc: int, octant: Tuple,
+                   xs: List[int], ys: List[int]) -> List[Tuple[int, int]]:
+    sx, sy, swap, reverse = octant[:4]
+    if swap:
+        xs, ys = ys, xs
+    if reverse:
+        xs = xs[::-1]
+        ys = ys[::-1]
+    return [(xc + sx * u, yc + sy * v) for u, v in zip(xs, ys)]
+
+
+def _ellipse_quadrant(a: int, b: int) -> Tuple[List[int], List[int]]:
+    # Точки первой четверти эллипса x^2 / a^2 + y^2 / b^2 = 1 от (0, b)
+    # до (a, 0) по методу средней точки. Параметр решения - учетверенное
+    # значение F(x, y) = b^2 x^2 + a^2 y^2 - a^2 b^2 в средней точке,
+    # так что все вычисления целочисленные.
+    a2 = a * a
+    b2 = b * b
+    xs = []
+    ys = []
+    x = 0
+    y = b
+
+    # Область 1: наклон касательной по модулю меньше 1, шаг по x
+    d = 4 * b2 - 4 * a2 * b + a2
+    while b2 * x < a2 * y:
+        xs.append(x)
+        ys.append(y)
+        if d >= 0:
+            d -= 8 * a2 * (y - 1)
+            y -= 1
+        d += 4 * b2 * (2 * x + 3)
+        x += 1
+
+    # Область 2: шаг по y
+    d = b2 * (2 * x + 1) ** 2 + 4 * a2 * (y - 1) ** 2 - 4 * a2 * b2
+    while y >= 0:
+        xs.append(x)
+        ys.append(y)
+        if d <= 0:
+            d += 8 * b2 * (x + 1)
+            x += 1
+        d += 4 * a2 * (3 - 2 * y)
+        y -= 1
+
+    # У вытянутых эллипсов область 2 доходит до оси раньше, чем x = a:
+    # остаток строки y = 0 дописывается
+    for x in range(xs[-1] + 1, a + 1):
+        xs.append(x)
+        ys.append(0)
+
+    return xs, ys
+
+
+# Четверти эллипса в порядке обхода контура от точки (xc, yc + b):
+# (sx, sy, reverse). Точки на осях выдаются один раз: с x = 0 - четвертью
+# с sx > 0, с y = 0 - четвертью, которая идет к оси x (reverse = False),
+# так что строка на оси x выдается по ходу обхода.
+ELLIPSE_QUADRANTS = (
+    (1, 1, False),
+    (1, -1, True),
+    (-1, -1, False),
+    (-1, 1, True),
+)
+
+
+def _quadrant_indices(quadrant: Tuple, xs: List[int], ys: List[int]) -> Tuple[int, int]:
+    # Индексы точек первой четверти, которые четверть выдает без повторов:
+    # точки с x = 0 идут в начале списка, с y = 0 - в конце
+    sx, _, reverse = quadrant
+    first = 0
+    end = len(xs) - 1
+    if sx < 0:
+        while first <= end and xs[first] == 0:
+            first += 1
+    if reverse:
+        while end >= first and ys[end] == 0:
+            end -= 1
+    return first, end
+
+
+def _arc_angle(dx: int, dy: int) -> float:
+    # Направление на точку от центра в градусах из [0, 360), от оси x к оси y
+    return math.degrees(math.atan2(dy, dx)) % 360.0
+
+
+def _arc_sweep(start: float, end: float) -> Tuple[float, float]:
+    # Дуга от start до end в сторону роста угла: (начало в [0, 360), размах).
+    # Размах от 360 и больше - вся кривая.
+    if end - start >= 360:
+        return start % 360.0, 360.0
+    return start % 360.0, (end - start) % 360.0
+
+
+def _arc_ranges(angle: Callable[[int], float], first: int, end: int,
+                start: float, sweep: float) -> List[Tuple[int, int]]:
+    # Диапазоны k из [first, end], для которых (angle(k) - start) % 360 <= sweep.
+    # Угол монотонен по k, поэтому граница start делит диапазон на две части,
+    # а на каждой части смещение от start тоже монотонно: концы ищутся
+    # двоичным поиском, точки вне дуги не вычисляются.
+    if first > end:
+        return []
+    if sweep >= 360:
+        return [(first, end)]
+
+    last = end - first
+    increasing = angle(first) <= angle(end)
+    f = lambda k: angle(first + k)
+
+    upper = _monotone_range(f, last, start, 360.0, increasing)
+    if upper is None:
+        pieces = [(0, last)]
+    elif increasing:
+        pieces = [(0, upper[0] - 1), upper]
+    else:
+        pieces = [upper, (upper[1] + 1, last)]
+
+    ranges = []
+    for piece_first, piece_end in pieces:
+        if piece_first > piece_end:
+            continue
+        offset = lambda k: (f(piece_first + k) - start) % 360.0
+        found = _monotone_range(offset, piece_end - piece_first, -1.0, sweep, increasing)
+        if found is not None:
+            ranges.append((first + piece_first + found[0], first + piece_first + found[1]))
+    return ranges
+
+
+def _density_walk(position: Callable[[int], Tuple[int, int]], first: int, last: int,
+                  x0: int, y0: int, block: int, counts: Dict[Tuple[int, int], int]):
+    # Число точек в каждом блоке block x block для параметров k из
+    # [first, last]. Обе координаты position(k) монотонны, поэтому точки
+    # одного блока идут подряд: конец серии ищется экспоненциальным и
+    # двоичным поиском, и работа пропорциональна числу пересеченных
+    # блоков, а не числу точек.
+    k = first
+    while k <= last:
+        px, py = position(k)
+        cell = ((px - x0) // block, (py - y0) // block)
+
+        def inside(j):
+            qx, qy = position(j)
+            return ((qx - x0) // block, (qy - y0) // block) == cell
+
+        end = k
+        step = 1
+        while end + step <= last and inside(end + step):
+            end += step
+            step *= 2
+        hi = min(last, end + step - 1)
+        while end < hi:
+            mid = (end + hi + 1) // 2
+            if inside(mid):
+                end = mid
+            else:
+                hi = mid - 1
+
+        counts[cell] = counts.get(cell, 0) + end - k + 1
+        k = end + 1
+
+
+def _float_line_walker(algorithm: str, x1: int, y1: int, x2: int,
+                       y2: int) -> Callable[[int], Tuple[int, int]]:
+    # position(k) для step и dda при запросах, которые в основном идут
+    # вперед: накопленные значения x, y продолжаются от ближайшего уже
+    # вычисленного шага, а не от начала отрезка
+    dx = x2 - x1
+    dy = y2 - y1
+    steps = max(abs(dx), abs(dy))
+    x_increment = dx / steps if steps else 0.0
+    y_increment = dy / steps if steps else 0.0
+    known = [(0, float(x1), float(y1))]
+
+    def position(k):
+        i = bisect_right(known, (k, math.inf, math.inf)) - 1
+        base, x, y = known[i]
+        if base != k:
+            x = _float_advance(x, x_increment, k - base)
+            y = _float_advance(y, y_increment, k - base)
+            insort(known, (k, x, y))
+            if len(known) > 256:
+                del known[1:129]
+        if algorithm == "step":
+            return round(x), round(y)
+        return int(x + 0.5), int(y + 0.5)
+
+    return position
+
+
+def _chunk_bounds(offsets, chunk_steps: int):
+    # Границы групп отрезков примерно по chunk_steps точек; offsets -
+    # начала точек отрезков и общее число точек в конце
+    bounds = np.searchsorted(offsets, np.arange(0, int(offsets[-1]), chunk_steps),
+                             side="right") - 1
+    return np.unique(np.append(bounds, len(offsets) - 1))
+
+
+def _bresenham_chunk(segments, counts):
+    # Точки bresenham_line для группы отрезков подряд: смещение по
+    # неосновной оси на шаге k равно _bresenham_minor_offset(k, major, minor).
+    # Произведение k * minor помещается в int64 при длине отрезка до 3 * 10^9.
+    x1, y1, x2, y2 = segments.T
+    dx = x2 - x1
+    dy = y2 - y1
+    adx = np.abs(dx)
+    ady = np.abs(dy)
+    sx = np.where(dx > 0, 1, -1)
+    sy = np.where(dy > 0, 1, -1)
+    x_major = adx >= ady
+    major = np.maximum(np.maximum(adx, ady), 1)
+    minor = np.minimum(adx, ady)
+
+    first = np.zeros(len(segments), dtype=np.int64)
+    np.cumsum(counts[:-1], out=first[1:])
+    k = np.arange(int(counts.sum()), dtype=np.int64) - np.repeat(first, counts)
+    major_k = np.repeat(major, counts)
+    e = k * np.repeat(minor, counts)
+    m = e // major_k
+    e -= m * major_k
+    m += 2 * e > major_k
+
+    x_major = np.repeat(x_major, counts)
+    xs = np.repeat(x1, counts) + np.repeat(sx, counts) * np.where(x_major, k, m)
+    ys = np.repeat(y1, counts) + np.repeat(sy, counts) * np.where(x_major, m, k)
+    return xs, ys
+
+
+def _wu_chunk(segments, value: Optional[int] = None):
+    # Точки wu_line для группы отрезков: (xs, ys, weights, counts), где
+    # counts - число точек каждого отрезка. С value вместо покрытий
+    # возвращаются целые уровни по правилу RasterBuffer.wu_line.
+    x1, y1, x2, y2 = segments.T
+    dx = x2 - x1
+    dy = y2 - y1
+    adx = np.abs(dx)
+    ady = np.abs(dy)
+    sx = np.where(dx >= 0, 1, -1)
+    sy = np.where(dy >= 0, 1, -1)
+    x_major = adx >= ady
+    major = np.maximum(np.maximum(adx, ady), 1)
+    minor = np.minimum(adx, ady)
+    counts = np.maximum(adx, ady) + 1
+
+    # Параметры отрезка на каждом шаге: k - номер шага, q и e - целая часть
+    # и числитель дробной части смещения по неосновной оси
+    first = np.zeros(len(segments), dtype=np.int64)
+    np.cumsum(counts[:-1], out=first[1:])
+    k = np.arange(int(counts.sum()), dtype=np.int64) - np.repeat(first, counts)
+    major_k = np.repeat(major, counts)
+    e = k * np.repeat(minor, counts)
+    q = e // major_k
+    e -= q * major_k
+
+    # x = x1 + k * sx по основной оси x или q * sx по неосновной, так же y;
+    # внешняя точка сдвинута на единицу по неосновной оси
+    kx = np.where(x_major, sx, 0)
+    ky = np.where(x_major, 0, sy)
+    qx = sx - kx
+    qy = sy - ky
+    x = np.repeat(x1, counts) + k * np.repeat(kx, counts) + q * np.repeat(qx, counts)
+    y = np.repeat(y1, counts) + k * np.repeat(ky, counts) + q * np.repeat(qy, counts)
+    outer = e > 0
+    total = len(k)
+    xs = np.empty((total, 2), dtype=np.int64)
+    ys = np.empty((total, 2), dtype=np.int64)
+    ws = np.empty((total, 2), dtype=np.float64 if value is None else np.int64)
+    keep = np.empty((total, 2), dtype=bool)
+    xs[:, 0] = x
+    xs[:, 1] = x + np.repeat(qx, counts)
+    ys[:, 0] = y
+    ys[:, 1] = y + np.repeat(qy, counts)
+    if value is None:
+        w = e / major_k
+        ws[:, 0] = 1.0 - w
+        ws[:, 1] = w
+    else:
+        # Уровень внешней точки value * e / major, округленный точно в целых;
+        # внутренняя получает остаток до value
+        level = (2 * value * e + major_k) // (2 * major_k)
+        ws[:, 0] = value - level
+        ws[:, 1] = level
+    keep[:, 0] = True
+    keep[:, 1] = outer
+    keep = keep.ravel()
+
+    point_counts = counts + np.add.reduceat(outer, first) if total else counts
+    return xs.ravel()[keep], ys.ravel()[keep], ws.ravel()[keep], point_counts
+
+
+def _parallel_task(task):
+    # Обработка одного блока примитивов в процессе-исполнителе. Если задан
+    # кадровый буфер, точки пишутся в общий файл, отображенный в память,
+    # иначе блок возвращается в виде компактных массивов.
+    kind, items, algorithm, target = task
+
+    if kind == "lines":
+        xs, ys, offsets = RasterAlgorithms.rasterize_lines_batch(items, algorithm)
+    else:
+        parts = [RasterAlgorithms.bresenham_circle_arrays(*circle) for circle in items.tolist()]
+        counts = [len(part[0]) for part in parts]
+        offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        if parts:
+            xs = np.concatenate([part[0] for part in parts])
+            ys = np.concatenate([part[1] for part in parts])
+        else:
+            xs = np.empty(0, dtype=np.int64)
+            ys = np.empty(0, dtype=np.int64)
+
+    if target is None:
+        return xs, ys, offsets
+
+    path, height, width = target
+    data = np.memmap(path, dtype=np.uint8, mode="r+", shape=(height, width))
+    RasterBuffer(width, height, data)._put(xs, ys, 1)
+    data.flush()
+    del data
+    return len(xs)
+
+
+class RasterAlgorithms:
+    
+    @staticmethod
+    def step_by_step(x1: int, y1: int, x2: int, y2: int,
+                     viewport: Optional[Viewport] = None,
+                     trace: Optional["RasterTrace"] = None) -> List[Tuple[int, int]]:
+        if viewport is not None:
+            return RasterAlgorithms.clipped_line("step", x1, y1, x2, y2, viewport, trace)
+        if trace is not None:
+            steps = max(abs(x2 - x1), abs(y2 - y1))
+            return RasterAlgorithms.line_range("step", x1, y1, x2, y2, 0, steps, trace)
+        points = []
+        dx = x2 - x1
+        dy = y2 - y1
+        
+        steps = max(abs(dx), abs(dy))
+        
+        if steps == 0:
+            return [(x1, y1)]
+
+        x_increment = dx / steps
+        y_increment = dy / steps
+
+        x = float(x1)
+        y = float(y1)
+
+        for _ in range(steps + 1):
+            points.append((round(x), round(y)))
+            x += x_increment
+            y += y_increment
+            
+        return points
+    
+    @staticmethod
+    def dda(x1: int, y1: int, x2: int, y2: int,
+            viewport: Optional[Viewport] = None,
+            trace: Optional["RasterTrace"] = None) -> List[Tuple[int, int]]:
+        if viewport is not None:
+            return RasterAlgorithms.clipped_line("dda", x1, y1, x2, y2, viewport, trace)
+        if trace is not None:
+            steps = max(abs(x2 - x1), abs(y2 - y1))
+            return RasterAlgorithms.line_range("dda", x1, y1, x2, y2, 0, steps, trace)
+
+        points = []
+        dx = x2 - x1
+        dy = y2 - y1
+
+        steps = max(abs(dx), abs(dy))
+        
+        if steps == 0:
+            return [(x1, y1)]
+
+        x_increment = dx / steps
+        y_increment = dy / steps
+
+        x = float(x1)
+        y = float(y1)
+
+        for _ in range(steps + 1):
+            points.append((int(x + 0.5), int(y + 0.5)))
+            x += x_increment
+            y += y_increment
+            
+        return points
+    
+    @staticmethod
+    def bresenham_line(x1: int, y1: int, x2: int, y2: int,
+                       viewport: Optional[Viewport] = None,
+                       trace: Optional["RasterTrace"] = None) -> List[Tuple[int, int]]:
+        if viewport is not None:
+            return RasterAlgorithms.clipped_line("bresenham_line", x1, y1, x2, y2, viewport, trace)
+        if trace is not None:
+            steps = max(abs(x2 - x1), abs(y2 - y1))
+            return RasterAlgorithms.line_range("bresenham_line", x1, y1, x2, y2, 0, steps, trace)
+
+        points = []
+        dx = abs(x2 - x1)
+        dy = abs(y2 - y1)
+
+        sx = 1 if x1 < x2 else -1
+        sy = 1 if y1 < y2 else -1
+        
+        err = dx - dy
+        x, y = x1, y1
+        
+        while True:
+            points.append((x, y))
+            
+            if x == x2 and y == y2:
+                break
+                
+            e2 = 2 * err
+            
+            if e2 > -dy:
+                err -= dy
+                x += sx
+                
+            if e2 < dx:
+                err += dx
+                y += sy
+                
+        return points
+    
+    @staticmethod
+    def bresenham_circle(xc: int, yc: int, r: int,
+                         viewport: Optional[Viewport] = None,
+                         trace: Optional["RasterTrace"] = None) -> List[Tuple[int, int]]:
+        if trace is not None and viewport is None:
+            viewport = (xc - r, yc - r, xc + r, yc + r)
+        if viewport is not None:
+            return RasterAlgorithms.clipped_circle(xc, yc, r, viewport, trace=trace)
+
+        # Точки выдаются в порядке обхода контура, каждая ровно один раз:
+        # сначала считается первый октант, затем он отражается по ветвям
+        xs = []
+        ys = []
+        x = 0
+        y = r
+        d = 3 - 2 * r
+        
+        while y >= x:
+            xs.append(x)
+            ys.append(y)
+            x += 1
+            
+            if d > 0:
+                y -= 1
+                d = d + 4 * (x - y) + 10
+            else:
+                d = d + 4 * x + 6
+
+        if not xs:
+            return []
+
+        last = len(xs) - 1
+        diagonal = xs[last] == ys[last]
+        points = []
+
+        for octant in CIRCLE_OCTANTS:
+            first, end = _octant_columns(octant, last, diagonal)
+            points.extend(_octant_points(xc, yc, octant,
+                                         xs[first:end + 1], ys[first:end + 1]))
+
+        return points
+
+    @staticmethod
+    def bresenham_circle_arrays(xc: int, yc: int, r: int):
+        # То же, что bresenham_circle, но в виде массивов NumPy (xs, ys)
+        if np is None:
+            raise ImportError("Для вывода в массивы требуется NumPy")
+        if r < 0:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty.copy()
+
+        anchor = _circle_anchor(r)
+        last = _circle_last_x(r, anchor)
+
+        if r < 2 ** 30:
+            # До опорного столбца y вычисляется сразу для всех x
+            xs = np.arange(last + 1, dtype=np.int64)
+            ys = np.empty(last + 1, dtype=np.int64)
+            head = xs[:anchor + 1]
+            n = 4 * (r - 1) ** 2 + 15 - 4 * (head + 1) ** 2
+            root = np.sqrt(n.astype(np.float64)).astype(np.int64)
+            root -= root * root > n
+            root += (root + 1) * (root + 1) <= n
+            ys[:anchor + 1] = 1 + (root + 1) // 2
+            ys[0] = r
+            tail_xs, tail_ys = _circle_octant(r, anchor + 1, last, anchor)
+            ys[anchor + 1:] = tail_ys
+        else:
+            octant_xs, octant_ys = _circle_octant(r, 0, last, anchor)
+            xs = np.array(octant_xs, dtype=np.int64)
+            ys = np.array(octant_ys, dtype=np.int64)
+
+        diagonal = xs[last] == ys[last]
+        parts_x = []
+        parts_y = []
+
+        for octant in CIRCLE_OCTANTS:
+            sx, sy, swap, reverse = octant[:4]
+            first, end = _octant_columns(octant, last, diagonal)
+            u = xs[first:end + 1]
+            v = ys[first:end + 1]
+            if swap:
+                u, v = v, u
+            if reverse:
+                u = u[::-1]
+                v = v[::-1]
+            parts_x.append(xc + sx * u)
+            parts_y.append(yc + sy * v)
+
+        return np.concatenate(parts_x), np.concatenate(parts_y)
+
+    @staticmethod
+    def circle_arc(xc: int, yc: int, r: int,
+                   start: float, end: float) -> List[Tuple[int, int]]:
+        # Точки bresenham_circle, направление на которые лежит на дуге от
+        # start до end градусов (угол растет от оси x к оси y), в том же
+        # порядке обхода. Для каждой ветви CIRCLE_OCTANTS угол монотонен по
+        # столбцу, так что нужные столбцы находятся двоичным поиском и
+        # вычисляются только они.
+        if r < 0:
+            return []
+
+        start, sweep = _arc_sweep(start, end)
+        anchor = _circle_anchor(r)
+        last = _circle_last_x(r, anchor)
+        diagonal = _circle_state(r, last, anchor)[0] == last
+        points = []
+
+        for octant in CIRCLE_OCTANTS:
+            sx, sy, swap, reverse = octant[:4]
+            first, end_column = _octant_columns(octant, last, diagonal)
+
+            def angle(x, sx=sx, sy=sy, swap=swap):
+                y = _circle_state(r, x, anchor)[0]
+                return _arc_angle(sx * y, sy * x) if swap else _arc_angle(sx * x, sy * y)
+
+            ranges = _arc_ranges(angle, first, end_column, start, sweep)
+            for columns in (ranges[::-1] if reverse else ranges):
+                xs, ys = _circle_octant(r, columns[0], columns[1], anchor)
+                points.extend(_octant_points(xc, yc, octant, xs, ys))
+
+        return points
+
+    @staticmethod
+    def midpoint_ellipse(xc: int, yc: int, a: int, b: int) -> List[Tuple[int, int]]:
+        # Эллипс с полуосями a и b вдоль осей координат: считается первая
+        # четверть, остальные получаются отражением. Точки выдаются в порядке
+        # обхода контура от (xc, yc + b), каждая ровно один раз. У вытянутых
+        # эллипсов на оси x лежит строка из нескольких точек: обход доходит по
+        # ней до вершины (±a, 0) и продолжается с соседней строки: только
+        # здесь соседние точки списка отстоят на длину этой строки.
+        if a < 0 or b < 0:
+            return []
+
+        xs, ys = _ellipse_quadrant(a, b)
+        points = []
+        for quadrant in ELLIPSE_QUADRANTS:
+            sx, sy, reverse = quadrant
+            first, end = _quadrant_indices(quadrant, xs, ys)
+            indices = range(end, first - 1, -1) if reverse else range(first, end + 1)
+            points.extend([(xc + sx * xs[i], yc + sy * ys[i]) for i in indices])
+        return points
+
+    @staticmethod
+    def ellipse_arc(xc: int, yc: int, a: int, b: int,
+                    start: float, end: float) -> List[Tuple[int, int]]:
+        # Точки midpoint_ellipse, направление на которые лежит на дуге от
+        # start до end градусов. Первая четверть вычисляется один раз, из
+        # каждой четверти отражается только нужный участок.
+        if a < 0 or b < 0:
+            return []
+
+        start, sweep = _arc_sweep(start, end)
+        xs, ys = _ellipse_quadrant(a, b)
+        points = []
+
+        for quadrant in ELLIPSE_QUADRANTS:
+            sx, sy, reverse = quadrant
+            first, end_index = _quadrant_indices(quadrant, xs, ys)
+            angle = lambda i, sx=sx, sy=sy: _arc_angle(sx * xs[i], sy * ys[i])
+            ranges = _arc_ranges(angle, first, end_index, start, sweep)
+            for low, high in (ranges[::-1] if reverse else ranges):
+                indices = range(high, low - 1, -1) if reverse else range(low, high + 1)
+                points.extend([(xc + sx * xs[i], yc + sy * ys[i]) for i in indices])
+
+        return points
+
+    @staticmethod
+    def step_by_step_fixed(x1: int, y1: int, x2: int, y2: int) -> List[Tuple[int, int]]:
+        return RasterAlgorithms._fixed_point_line("step", x1, y1, x2, y2)
+
+    @staticmethod
+    def dda_fixed(x1: int, y1: int, x2: int, y2: int) -> List[Tuple[int, int]]:
+        return RasterAlgorithms._fixed_point_line("dda", x1, y1, x2, y2)
+
+    @staticmethod
+    def _fixed_point_line(algorithm: str, x1: int, y1: int, x2: int,
+                          y2: int) -> List[Tuple[int, int]]:
+        # ЦДА с целочисленным аккумулятором: вдоль основной оси координата
+        # меняется ровно на 1 за шаг, а по неосновной хранится пиксель и
+        # ошибка e в единицах 1 / (2 * steps). Погрешность не накапливается,
+        # поэтому результат - точное округление x1 + k * dx / steps по тем же
+        # правилам, что round() и int(x + 0.5), для любых целых координат.
+        dx = x2 - x1
+        dy = y2 - y1
+        steps = max(abs(dx), abs(dy))
+
+        if steps == 0:
+            return [(x1, y1)]
+
+        x_major = abs(dx) >= abs(dy)
+        if x_major:
+            a, da, b, db = x1, dx, y1, dy
+        else:
+            a, da, b, db = y1, dy, x1, dx
+
+        sa = 1 if da > 0 else -1
+        sb = 1 if db > 0 else -1
+        step = 2 * abs(db)
+        double = 2 * steps
+        points = []
+
+        if algorithm == "step":
+            # Округление к четному симметрично, поэтому ошибка считается
+            # в направлении движения: b + sb * e / (2 * steps), e в (-steps, steps]
+            e = 0
+            if x_major:
+                for _ in range(steps + 1):
+                    points.append((a, b))
+                    a += sa
+                    e += step
+                    if e > steps or (e == steps and b & 1):
+                        e -= double
+                        b += sb
+            else:
+                for _ in range(steps + 1):
+                    points.append((b, a))
+                    a += sa
+                    e += step
+                    if e > steps or (e == steps and b & 1):
+                        e -= double
+                        b += sb
+            return points
+
+        # int(v + 0.5) округляет половину вверх при v >= -0.5 и дает
+        # ceil(v + 0.5) при меньших v, поэтому отрезок делится на участки,
+        # где правило округления по каждой оси постоянно
+        bounds = {0, steps + 1}
+        bounds.add(-a if sa > 0 else a + 1)
+        if db != 0:
+            origin = double * b + steps
+            if sb > 0:
+                bounds.add(-(origin // step))
+            else:
+                bounds.add(origin // step + 1)
+        bounds = sorted(k for k in bounds if 0 <= k <= steps + 1)
+
+        for k_start, k_end in zip(bounds, bounds[1:]):
+            major = a + sa * k_start
+            pa = major + 1 if major < 0 else major
+
+            # Значение по неосновной оси: b + sb * m / steps
+            m = k_start * abs(db)
+            negative = double * b + 2 * sb * m + steps < 0
+            half_up = not negative
+            threshold = steps if half_up == (sb > 0) else steps + 1
+            j = (2 * m - threshold + double) // double
+            e = 2 * m - double * j
+            pb = b + sb * j + (1 if negative else 0)
+
+            RasterAlgorithms._fixed_point_run(points, k_end - k_start, x_major,
+                                              pa, sa, pb, sb, e, step,
+                                              threshold, double)
+        return points
+
+    @staticmethod
+    def _fixed_point_run(points, count, x_major, pa, sa, pb, sb, e, step,
+                         threshold, double):
+        if x_major:
+            for _ in range(count):
+                points.append((pa, pb))
+                pa += sa
+                e += step
+                if e >= threshold:
+                    e -= double
+                    pb += sb
+        else:
+            for _ in range(count):
+                points.append((pb, pa))
+                pa += sa
+                e += step
+                if e >= threshold:
+                    e -= double
+                    pb += sb
+
+    @staticmethod
+    def wu_line(x1: int, y1: int, x2: int, y2: int) -> List[Tuple[int, int, float]]:
+        # Сглаженный отрезок Ву: на каждом шаге по основной оси - точка с
+        # покрытием 1 - e и ее соседка по неосновной оси с покрытием e, где
+        # e - дробная часть точной координаты. Дробь хранится числителем
+        # err / major, как ошибка в алгоритме Брезенхема, так что цикл
+        # целочисленный; нулевые покрытия не выдаются.
+        dx = x2 - x1
+        dy = y2 - y1
+        adx = abs(dx)
+        ady = abs(dy)
+        sx = 1 if dx >= 0 else -1
+        sy = 1 if dy >= 0 else -1
+
+        if adx == 0 and ady == 0:
+            return [(x1, y1, 1.0)]
+
+        points = []
+        x, y = x1, y1
+        err = 0
+
+        if adx >= ady:
+            for _ in range(adx + 1):
+                if err:
+                    w = err / adx
+                    points.append((x, y, 1.0 - w))
+                    points.append((x, y + sy, w))
+                else:
+                    points.append((x, y, 1.0))
+                x += sx
+                err += ady
+                if err >= adx:
+                    err -= adx
+                    y += sy
+        else:
+            for _ in range(ady + 1):
+                if err:
+                    w = err / ady
+                    points.append((x, y, 1.0 - w))
+                    points.append((x + sx, y, w))
+                else:
+                    points.append((x, y, 1.0))
+                y += sy
+                err += adx
+                if err >= ady:
+                    err -= ady
+                    x += sx
+
+        return points
+
+    @staticmethod
+    def wu_circle(xc: int, yc: int, r: int) -> List[Tuple[int, int, float]]:
+        # Сглаженная окружность Ву. В столбцах x <= r / sqrt(2) первого
+        # октанта y = sqrt(r^2 - x^2) делится на целую часть (точка с
+        # покрытием 1 - e) и дробную e (точка снаружи). Второй октант -
+        # то же с переставленными осями, без столбцов первого, так что
+        # точки четверти не повторяются. Четверть отражается на остальные.
+        if r < 0:
+            return []
+        if r == 0:
+            return [(xc, yc, 1.0)]
+
+        quarter = []
+        last = math.isqrt(r * r // 2)
+        rr = r * r
+
+        for x in range(last + 1):
+            n = rr - x * x
+            y = math.isqrt(n)
+            w = min(math.sqrt(n) - y, 1.0)
+            if w < 1.0:
+                quarter.append((x, y, 1.0 - w))
+            if w > 0.0:
+                quarter.append((x, y + 1, w))
+
+        for u, v, w in quarter[:]:
+            if v > last:
+                quarter.append((v, u, w))
+
+        points = []
+        for u, v, w in quarter:
+            points.append((xc + u, yc + v, w))
+            if u:
+                points.append((xc - u, yc + v, w))
+            if v:
+                points.append((xc + u, yc - v, w))
+                if u:
+                    points.append((xc - u, yc - v, w))
+        return points
+
+    @staticmethod
+    def wu_circle_arrays(xc: int, yc: int, r: int):
+        # То же, что wu_circle, в виде массивов NumPy (xs, ys, weights)
+        if np is None:
+            raise ImportError("Для вывода в массивы требуется NumPy")
+        if r < 0 or r >= 2 ** 26:
+            # Для больших r квадраты не представимы во float точно
+            points = RasterAlgorithms.wu_circle(xc, yc, r)
+            if not points:
+                return (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64),
+                        np.empty(0, dtype=np.float64))
+            xs, ys, ws = zip(*points)
+            return (np.array(xs, dtype=np.int64), np.array(ys, dtype=np.int64),
+                    np.array(ws, dtype=np.float64))
+        if r == 0:
+            return (np.array([xc], dtype=np.int64), np.array([yc], dtype=np.int64),
+                    np.ones(1, dtype=np.float64))
+
+        last = math.isqrt(r * r // 2)
+        x = np.arange(last + 1, dtype=np.int64)
+        n = r * r - x * x
+        root = np.sqrt(n.astype(np.float64))
+        y = root.astype(np.int64)
+        y -= y * y > n
+        y += (y + 1) * (y + 1) <= n
+        w = np.minimum(root - y, 1.0)
+
+        # Внутренняя и внешняя точка каждого столбца, как в wu_circle
+        u = np.stack([x, x], axis=1).ravel()
+        v = np.stack([y, y + 1], axis=1).ravel()
+        weights = np.stack([1.0 - w, w], axis=1).ravel()
+        keep = np.stack([w < 1.0, w > 0.0], axis=1).ravel()
+        u, v, weights = u[keep], v[keep], weights[keep]
+
+        swapped = v > last
+        u, v = np.concatenate([u, v[swapped]]), np.concatenate([v, u[swapped]])
+        weights = np.concatenate([weights, weights[swapped]])
+
+        # Отражения в порядке wu_circle: (+u, +v), (-u, +v), (+u, -v), (-u, -v)
+        copies = np.stack([np.ones_like(u, dtype=bool), u != 0, v != 0, (u != 0) & (v != 0)], axis=1)
+        signs_x = np.array([1, -1, 1, -1])
+        signs_y = np.array([1, 1, -1, -1])
+        xs = (xc + u[:, None] * signs_x)[copies]
+        ys = (yc + v[:, None] * signs_y)[copies]
+        ws = np.broadcast_to(weights[:, None], copies.shape)[copies]
+        return xs, ys, ws
+
+    @staticmethod
+    def line_position(algorithm: str, x1: int, y1: int, x2: int, y2: int,
+                      k: int) -> Tuple[int, int]:
+        # Точка отрезка на шаге k без прохода по предыдущим шагам
+        dx = x2 - x1
+        dy = y2 - y1
+        steps = max(abs(dx), abs(dy))
+
+        if algorithm == "bresenham_line":
+            return _bresenham_state(x1, y1, x2, y2, k)[:2]
+
+        if steps == 0:
+            return x1, y1
+
+        x = _float_advance(float(x1), dx / steps, k)
+        y = _float_advance(float(y1), dy / steps, k)
+        if algorithm == "step":
+            return round(x), round(y)
+        return int(x + 0.5), int(y + 0.5)
+
+    @staticmethod
+    def clip_line(algorithm: str, x1: int, y1: int, x2: int, y2: int,
+                  viewport: Viewport) -> Optional[Tuple[int, int]]:
+        # Диапазон шагов [k_start, k_end], точки которых попадают в область
+        # просмотра, или None. Координата точки по каждой оси монотонна по k,
+        # поэтому видимые шаги образуют непрерывный отрезок параметра,
+        # как в отсечении Лианга-Барски, только в целых шагах алгоритма.
+        if algorithm not in LINE_ALGORITHMS:
+            raise ValueError(f"Неизвестный алгоритм: {algorithm}")
+
+        x_min, y_min, x_max, y_max = viewport
+        last = max(abs(x2 - x1), abs(y2 - y1))
+
+        def position(k):
+            return RasterAlgorithms.line_position(algorithm, x1, y1, x2, y2, k)
+
+        x_range = _monotone_range(lambda k: position(k)[0], last,
+                                  x_min, x_max, x2 >= x1)
+        if x_range is None:
+            return None
+        y_range = _monotone_range(lambda k: position(k)[1], last,
+                                  y_min, y_max, y2 >= y1)
+        if y_range is None:
+            return None
+
+        k_start = max(x_range[0], y_range[0])
+        k_end = min(x_range[1], y_range[1])
+        if k_start > k_end:
+            return None
+        return k_start, k_end
+
+    @staticmethod
+    def line_range(algorithm: str, x1: int, y1: int, x2: int, y2: int,
+                   k_start: int, k_end: int,
+                   trace: Optional["RasterTrace"] = None) -> List[Tuple[int, int]]:
+        # Точки отрезка для шагов с k_start по k_end: состояние алгоритма
+        # восстанавливается для k_start, дальше идет обычный цикл. С trace
+        # первые шаги выполняются с записью переменных алгоритма.
+        points = []
+        count = k_end - k_start + 1
+        dx = x2 - x1
+        dy = y2 - y1
+        traced = 0
+        if trace is not None:
+            trace.start_line(algorithm, x1, y1, x2, y2)
+            trace.total = count
+            traced = min(count, trace.room())
+            columns = trace.columns
+
+        if algorithm == "bresenham_line":
+            adx = abs(dx)
+            ady = abs(dy)
+            sx = 1 if x1 < x2 else -1
+            sy = 1 if y1 < y2 else -1
+
+            x, y, err = _bresenham_state(x1, y1, x2, y2, k_start)
+
+            if traced:
+                trace_k, trace_x, trace_y, trace_err = (
+                    columns[name] for name in ("k", "x", "y", "err"))
+                for k in range(k_start, k_start + traced):
+                    trace_k.append(k)
+                    trace_x.append(x)
+                    trace_y.append(y)
+                    trace_err.append(err)
+                    points.append((x, y))
+                    e2 = 2 * err
+                    if e2 > -ady:
+                        err -= ady
+                        x += sx
+                    if e2 < adx:
+                        err += adx
+                        y += sy
+
+            for _ in range(count - traced):
+                points.append((x, y))
+                e2 = 2 * err
+                if e2 > -ady:
+                    err -= ady
+                    x += sx
+                if e2 < adx:
+                    err += adx
+                    y += sy
+            return points
+
+        steps = max(abs(dx), abs(dy))
+        if steps == 0:
+            if traced:
+                for name, value in (("k", 0), ("x", float(x1)), ("y", float(y1)),
+                                    ("px", x1), ("py", y1)):
+                    columns[name].append(value)
+            return [(x1, y1)]
+
+        x_increment = dx / steps
+        y_increment = dy / steps
+        x = _float_advance(float(x1), x_increment, k_start)
+        y = _float_advance(float(y1), y_increment, k_start)
+
+        if traced:
+            trace_k, trace_x, trace_y, trace_px, trace_py = (
+                columns[name] for name in ("k", "x", "y", "px", "py"))
+            for k in range(k_start, k_start + traced):
+                px, py = (round(x), round(y)) if algorithm == "step" else (int(x + 0.5), int(y + 0.5))
+                trace_k.append(k)
+                trace_x.append(x)
+                trace_y.append(y)
+                trace_px.append(px)
+                trace_py.append(py)
+                points.append((px, py))
+                x += x_increment
+                y += y_increment
+
+        if algorithm == "step":
+            for _ in range(count - traced):
+                points.append((round(x), round(y)))
+                x += x_increment
+                y += y_increment
+        else:
+            for _ in range(count - traced):
+                points.append((int(x + 0.5), int(y + 0.5)))
+                x += x_increment
+                y += y_increment
+        return points
+
+    @staticmethod
+    def clipped_line(algorithm: str, x1: int, y1: int, x2: int, y2: int, viewport: Viewport,
+                     trace: Optional["RasterTrace"] = None) -> List[Tuple[int, int]]:
+        steps = RasterAlgorithms.clip_line(algorithm, x1, y1, x2, y2, viewport)
+        if steps is None:
+            if trace is not None:
+                trace.start_line(algorithm, x1, y1, x2, y2)
+            return []
+        return RasterAlgorithms.line_range(algorithm, x1, y1, x2, y2, *steps, trace)
+
+    @staticmethod
+    def clip_circle(xc: int, yc: int, r: int,
+                    viewport: Viewport) -> List[Optional[Tuple[int, int]]]:
+        # Для каждой из восьми ветвей CIRCLE_OCTANTS - диапазон столбцов
+        # первого октанта, точки которых видимы, или None. Вдоль ветви
+        # обе координаты монотонны, так что диапазон непрерывен. Столбцы,
+        # общие с соседней ветвью, в диапазон не входят.
+        if r < 0:
+            return [None] * len(CIRCLE_OCTANTS)
+
+        x_min, y_min, x_max, y_max = viewport
+        anchor = _circle_anchor(r)
+        last = _circle_last_x(r, anchor)
+        diagonal = _circle_state(r, last, anchor)[0] == last
+        ranges = []
+
+        for octant in CIRCLE_OCTANTS:
+            sx, sy, swap = octant[:3]
+            first, end = _octant_columns(octant, last, diagonal)
+            if first > end:
+                ranges.append(None)
+                continue
+
+            if swap:
+                u = lambda x: _circle_state(r, x, anchor)[0]
+                v = lambda x: x
+            else:
+                u = lambda x: x
+                v = lambda x: _circle_state(r, x, anchor)[0]
+
+            # x растет по ходу ветви, y убывает
+            u_increasing = (sx > 0) != swap
+            v_increasing = (sy > 0) == swap
+
+            u_range = _monotone_range(lambda x: xc + sx * u(x), last,
+                                      x_min, x_max, u_increasing)
+            v_range = _monotone_range(lambda x: yc + sy * v(x), last,
+                                      y_min, y_max, v_increasing)
+            if u_range is None or v_range is None:
+                ranges.append(None)
+                continue
+
+            first = max(first, u_range[0], v_range[0])
+            end = min(end, u_range[1], v_range[1])
+            ranges.append((first, end) if first <= end else None)
+
+        return ranges
+
+    @staticmethod
+    def clipped_circle(xc: int, yc: int, r: int, viewport: Viewport,
+                       ranges: Optional[List[Optional[Tuple[int, int]]]] = None,
+                       trace: Optional["RasterTrace"] = None) -> List[Tuple[int, int]]:
+        # ranges - готовый результат clip_circle для той же области. В trace
+        # записывается один проход по столбцам первого октанта - для первой
+        # видимой ветви, остальные ветви повторяют те же столбцы.
+        points = []
+        if ranges is None:
+            ranges = RasterAlgorithms.clip_circle(xc, yc, r, viewport)
+        anchor = _circle_anchor(r) if r >= 0 else 0
+        if trace is not None:
+            trace.start("bresenham_circle", {"x": "q", "y": "q", "d": "q"},
+                        xc=xc, yc=yc, r=r, d0=3 - 2 * r)
+
+        for octant, columns in zip(CIRCLE_OCTANTS, ranges):
+            if columns is None:
+                continue
+            xs, ys = _circle_octant(r, columns[0], columns[1], anchor, trace)
+            points.extend(_octant_points(xc, yc, octant, xs, ys))
+            trace = None
+
+        return points
+
+    @staticmethod
+    def line_density(algorithm: str, x1: int, y1: int, x2: int, y2: int,
+                     viewport: Viewport, block: int) -> Dict[Tuple[int, int], int]:
+        # Число видимых точек отрезка в каждом блоке block x block области
+        # просмотра; ключ - номер блока от угла (x_min, y_min). Сами точки
+        # не строятся, поэтому отрезок может быть сколь угодно длинным.
+        counts: Dict[Tuple[int, int], int] = {}
+        steps = RasterAlgorithms.clip_line(algorithm, x1, y1, x2, y2, viewport)
+        if steps is None:
+            return counts
+
+        if algorithm == "bresenham_line":
+            def position(k):
+                return _bresenham_state(x1, y1, x2, y2, k)[:2]
+        else:
+            position = _float_line_walker(algorithm, x1, y1, x2, y2)
+
+        _density_walk(position, steps[0], steps[1], viewport[0], viewport[1], block, counts)
+        return counts
+
+    @staticmethod
+    def circle_density(xc: int, yc: int, r: int, viewport: Viewport,
+                       block: int) -> Dict[Tuple[int, int], int]:
+        # То же для окружности: по каждой видимой ветви отдельно
+        counts: Dict[Tuple[int, int], int] = {}
+        ranges = RasterAlgorithms.clip_circle(xc, yc, r, viewport)
+        anchor = _circle_anchor(r) if r >= 0 else 0
+
+        for octant, columns in zip(CIRCLE_OCTANTS, ranges):
+            if columns is None:
+                continue
+            sx, sy, swap = octant[:3]
+
+            def position(x, sx=sx, sy=sy, swap=swap):
+                y = _circle_state(r, x, anchor)[0]
+                u, v = (y, x) if swap else (x, y)
+                return xc + sx * u, yc + sy * v
+
+            _density_walk(position, columns[0], columns[1], viewport[0], viewport[1], block, counts)
+        return counts
+
+    @staticmethod
+    def iter_step_by_step(x1: int, y1: int, x2: int, y2: int,
+                          viewport: Optional[Viewport] = None) -> Iterator[Tuple[int, int]]:
+        return RasterAlgorithms.iter_line("step", x1, y1, x2, y2, viewport)
+
+    @staticmethod
+    def iter_dda(x1: int, y1: int, x2: int, y2: int,
+                 viewport: Optional[Viewport] = None) -> Iterator[Tuple[int, int]]:
+        return RasterAlgorithms.iter_line("dda", x1, y1, x2, y2, viewport)
+
+    @staticmethod
+    def iter_bresenham_line(x1: int, y1: int, x2: int, y2: int,
+                            viewport: Optional[Viewport] = None) -> Iterator[Tuple[int, int]]:
+        return RasterAlgorithms.iter_line("bresenham_line", x1, y1, x2, y2, viewport)
+
+    @staticmethod
+    def iter_line(algorithm: str, x1: int, y1: int, x2: int, y2: int,
+                  viewport: Optional[Viewport] = None) -> Iterator[Tuple[int, int]]:
+        # Ленивые варианты алгоритмов для отрезка: точки выдаются по мере
+        # вычисления в том же порядке, что и у списочных методов
+        if algorithm not in LINE_ALGORITHMS:
+            raise ValueError(f"Неизвестный алгоритм: {algorithm}")
+        if viewport is not None:
+            steps = RasterAlgorithms.clip_line(algorithm, x1, y1, x2, y2, viewport)
+        else:
+            steps = (0, max(abs(x2 - x1), abs(y2 - y1)))
+        if steps is None:
+            return iter(())
+        return RasterAlgorithms._iter_line_range(algorithm, x1, y1, x2, y2, *steps)
+
+    @staticmethod
+    def _iter_line_range(algorithm: str, x1: int, y1: int, x2: int, y2: int,
+                         k_start: int, k_end: int) -> Iterator[Tuple[int, int]]:
+        count = k_end - k_start + 1
+        dx = x2 - x1
+        dy = y2 - y1
+
+        if algorithm == "bresenham_line":
+            adx = abs(dx)
+            ady = abs(dy)
+            sx = 1 if x1 < x2 else -1
+            sy = 1 if y1 < y2 else -1
+            x, y, err = _bresenham_state(x1, y1, x2, y2, k_start)
+
+            for _ in range(count):
+                yield x, y
+                e2 = 2 * err
+                if e2 > -ady:
+                    err -= ady
+                    x += sx
+                if e2 < adx:
+                    err += adx
+                    y += sy
+            return
+
+        steps = max(abs(dx), abs(dy))
+        if steps == 0:
+            yield x1, y1
+            return
+
+        x_increment = dx / steps
+        y_increment = dy / steps
+        x = _float_advance(float(x1), x_increment, k_start)
+        y = _float_advance(float(y1), y_increment, k_start)
+
+        for _ in range(count):
+            if algorithm == "step":
+                yield round(x), round(y)
+            else:
+                yield int(x + 0.5), int(y + 0.5)
+            x += x_increment
+            y += y_increment
+
+    @staticmethod
+    def iter_bresenham_circle(xc: int, yc: int, r: int,
+                              viewport: Optional[Viewport] = None) -> Iterator[Tuple[int, int]]:
+        # Ленивый вариант bresenham_circle: тот же порядок обхода контура,
+        # память не зависит от радиуса
+        if r < 0:
+            return
+
+        anchor = _circle_anchor(r)
+        if viewport is not None:
+            ranges = RasterAlgorithms.clip_circle(xc, yc, r, viewport)
+        else:
+            last = _circle_last_x(r, anchor)
+            diagonal = _circle_state(r, last, anchor)[0] == last
+            ranges = [_octant_columns(octant, last, diagonal) for octant in CIRCLE_OCTANTS]
+
+        for octant, columns in zip(CIRCLE_OCTANTS, ranges):
+            if columns is None or columns[0] > columns[1]:
+                continue
+            sx, sy, swap, reverse = octant[:4]
+            for x, y in _iter_octant(r, columns[0], columns[1], anchor, reverse):
+                if swap:
+                    yield xc + sx * y, yc + sy * x
+                else:
+                    yield xc + sx * x, yc + sy * y
+
+    @staticmethod
+    def iter_chunks(points: Iterable[Tuple[int, int]],
+                    size: int) -> Iterator[List[Tuple[int, int]]]:
+        # Разбивает поток точек на списки не длиннее size
+        if size <= 0:
+            raise ValueError("Размер блока должен быть положительным")
+        points = iter(points)
+        while True:
+            chunk = list(islice(points, size))
+            if not chunk:
+                return
+            yield chunk
+
+    @staticmethod
+    def to_spans(points: Iterable[Tuple[int, int]]) -> List[Tuple[int, int, int]]:
+        # Группирует точки в горизонтальные серии (y, x_start, x_end),
+        # отсортированные по y и x; границы серии включительно
+        spans = []
+        for x, y in sorted(set(points), key=lambda p: (p[1], p[0])):
+            if spans and spans[-1][0] == y and spans[-1][2] == x - 1:
+                spans[-1] = (y, spans[-1][1], x)
+            else:
+                spans.append((y, x, x))
+        return spans
+
+    @staticmethod
+    def polygon_spans(vertices: Iterable[Tuple[int, int]], viewport: Optional[Viewport] = None,
+                      nonzero: bool = False) -> List[Tuple[int, int, int]]:
+        # Заливка многоугольника по строкам: таблица ребер, упорядоченная по
+        # первой строке, и список активных ребер. Пересечение ребра со
+        # строкой хранится целой частью и остатком от деления на dy, как
+        # ошибка в алгоритме Брезенхема, и переходит к следующей строке
+        # сложением, без float. Закрашиваются клетки, центр которых внутри
+        # многоугольника или на его границе, по правилу чет-нечет или, при
+        # nonzero, ненулевого индекса. Результат - серии (y, x_start, x_end)
+        # в формате to_spans.
+        points = [(int(x), int(y)) for x, y in vertices]
+        if not points:
+            return []
+
+        # Ребро занимает строки [y_start, y_end); нижний конец, горизонтальные
+        # ребра и вершины при обходе по четности теряются - они добавляются
+        # к своим строкам отдельно
+        edges = []
+        boundary: Dict[int, List[Tuple[int, int]]] = {}
+        for i, (xa, ya) in enumerate(points):
+            xb, yb = points[(i + 1) % len(points)]
+            boundary.setdefault(ya, []).append((xa, xa))
+            if ya == yb:
+                boundary[ya].append((min(xa, xb), max(xa, xb)))
+                continue
+            winding = 1 if yb > ya else -1
+            if yb < ya:
+                xa, ya, xb, yb = xb, yb, xa, ya
+            edges.append((ya, yb, xa, xb - xa, yb - ya, winding))
+
+        y_first = min(y for _, y in points)
+        y_last = max(y for _, y in points)
+        x_min = min(x for x, _ in points)
+        x_max = max(x for x, _ in points)
+        if viewport is not None:
+            x_min = max(x_min, viewport[0])
+            x_max = min(x_max, viewport[2])
+            y_first = max(y_first, viewport[1])
+            y_last = min(y_last, viewport[3])
+        if x_min > x_max:
+            return []
+
+        edges.sort(key=lambda edge: edge[0])
+        next_edge = 0
+        active = []
+        spans = []
+
+        for y in range(y_first, y_last + 1):
+            while next_edge < len(edges) and edges[next_edge][0] <= y:
+                y_start, y_end, x0, dx, dy, winding = edges[next_edge]
+                next_edge += 1
+                if y_end > y:
+                    # Ребро, начатое выше области, сразу переводится на строку y
+                    q, r = divmod(x0 * dy + (y - y_start) * dx, dy)
+                    step_q, step_r = divmod(dx, dy)
+                    active.append([q, r, step_q, step_r, dy, y_end, winding])
+
+            if active:
+                active = [edge for edge in active if edge[5] > y]
+                active.sort(key=lambda edge: (edge[0], edge[1] / edge[4]))
+
+            # Концы серии - ближайшие центры клеток внутри: ceil слева, floor справа
+            intervals = []
+            if nonzero:
+                count = 0
+                for edge in active:
+                    previous = count
+                    count += edge[6]
+                    if previous == 0:
+                        start = edge[0] + (edge[1] > 0)
+                    elif count == 0 and start <= edge[0]:
+                        intervals.append((start, edge[0]))
+            else:
+                for left, right in zip(active[::2], active[1::2]):
+                    start = left[0] + (left[1] > 0)
+                    if start <= right[0]:
+                        intervals.append((start, right[0]))
+
+            if y in boundary:
+                intervals.extend(boundary[y])
+                intervals.sort()
+
+            current_start = current_end = None
+            for a, b in intervals:
+                a = max(a, x_min)
+                b = min(b, x_max)
+                if a > b:
+                    continue
+                if current_end is not None and a <= current_end + 1:
+                    current_end = max(current_end, b)
+                else:
+                    if current_end is not None:
+                        spans.append((y, current_start, current_end))
+                    current_start, current_end = a, b
+            if current_end is not None:
+                spans.append((y, current_start, current_end))
+
+            for edge in active:
+                edge[0] += edge[2]
+                edge[1] += edge[3]
+                if edge[1] >= edge[4]:
+                    edge[1] -= edge[4]
+                    edge[0] += 1
+
+        return spans
+
+    @staticmethod
+    def filled_circle_spans(xc: int, yc: int, r: int,
+                            viewport: Optional[Viewport] = None) -> List[Tuple[int, int, int]]:
+        # Круг, ограниченный окружностью bresenham_circle: в каждой строке -
+        # одна серия между крайними точками окружности. Полуширина строки на
+        # расстоянии t от центра берется из первого октанта: для столбца
+        # t <= last это y(t), выше - наибольший x с y(x) >= t. Обе величины
+        # вычисляются в явном виде, как в clip_circle, так что время и память
+        # зависят только от числа видимых строк.
+        if r < 0:
+            return []
+
+        anchor = _circle_anchor(r)
+        last = _circle_last_x(r, anchor)
+        # Столбцы за опорным, где явная формула неточна, - их несколько
+        tail_xs, tail_ys = _circle_octant(r, anchor, last, anchor)
+
+        top = 4 * (r - 1) ** 2 + 15
+
+        def half(t):
+            if t <= last:
+                if t >= anchor:
+                    return tail_ys[t - anchor]
+                return _circle_closed_y(r, t) if t else r
+            if t <= tail_ys[0]:
+                return max(x for x, y in zip(tail_xs, tail_ys) if y >= t)
+            # _circle_closed_y(r, x) >= t при 4 (x + 1)^2 <= 4 (r - 1)^2 + 15 - (2t - 3)^2
+            return math.isqrt((top - (2 * t - 3) ** 2) // 4) - 1
+
+        x_min, y_min, x_max, y_max = viewport if viewport is not None else (
+            xc - r, yc - r, xc + r, yc + r)
+        first = max(yc - r, y_min)
+        end = min(yc + r, y_max)
+        if first > end:
+            return []
+
+        # Строки выше и ниже центра имеют общие полуширины
+        t_low = 0 if first <= yc <= end else min(abs(first - yc), abs(end - yc))
+        t_high = max(abs(first - yc), abs(end - yc))
+        widths = [half(t) for t in range(t_low, t_high + 1)]
+
+        spans = []
+        for y in range(first, end + 1):
+            width = widths[abs(y - yc) - t_low]
+            a = max(xc - width, x_min)
+            b = min(xc + width, x_max)
+            if a <= b:
+                spans.append((y, a, b))
+        return spans
+
+    @staticmethod
+    def bresenham_line_spans(x1: int, y1: int, x2: int, y2: int) -> List[Tuple[int, int, int]]:
+        # Run-slice вариант bresenham_line: серия пикселей одной строки
+        # вычисляется целиком по явной формуле смещения, без прохода по
+        # каждому пикселю. Серии идут в порядке обхода отрезка.
+        dx = abs(x2 - x1)
+        dy = abs(y2 - y1)
+        sx = 1 if x1 < x2 else -1
+        sy = 1 if y1 < y2 else -1
+
+        if dx <= dy:
+            # Крутой отрезок: в каждой строке ровно один пиксель
+            return [(y, x, x) for x, y in RasterAlgorithms.bresenham_line(x1, y1, x2, y2)]
+
+        spans = []
+        k_start = 0
+        for row in range(dy + 1):
+            if row < dy:
+                # Первый шаг, на котором смещение по y достигает row + 1
+                k_next = -((dx - 2 * dx * (row + 1) - 1) // (2 * dy))
+            else:
+                k_next = dx + 1
+            xa = x1 + sx * k_start
+            xb = x1 + sx * (k_next - 1)
+            spans.append((y1 + sy * row, min(xa, xb), max(xa, xb)))
+            k_start = k_next
+        return spans
+
+    @staticmethod
+    def bresenham_circle_spans(xc: int, yc: int, r: int) -> List[Tuple[int, int, int]]:
+        # Серии окружности по строкам: участки около полюсов дают длинные
+        # горизонтальные серии, боковые - по одному пикселю в строке.
+        # Результат совпадает с to_spans(bresenham_circle(xc, yc, r)).
+        if r < 0:
+            return []
+
+        anchor = _circle_anchor(r)
+        last = _circle_last_x(r, anchor)
+        xs, ys = _circle_octant(r, 0, last, anchor)
+        rows = {}
+
+        start = 0
+        for i in range(1, last + 2):
+            if i <= last and ys[i] == ys[start]:
+                continue
+            # Столбцы start..i-1 лежат в одной строке y
+            x_a, x_b, y = xs[start], xs[i - 1], ys[start]
+            for row in {yc + y, yc - y}:
+                rows.setdefault(row, []).extend(
+                    [(xc + x_a, xc + x_b), (xc - x_b, xc - x_a)])
+            start = i
+
+        for x, y in zip(xs, ys):
+            for row in {yc + x, yc - x}:
+                rows.setdefault(row, []).extend([(xc + y, xc + y), (xc - y, xc - y)])
+
+        spans = []
+        for row in sorted(rows):
+            intervals = sorted(rows[row])
+            current_start, current_end = intervals[0]
+            for a, b in intervals[1:]:
+                if a <= current_end + 1:
+                    current_end = max(current_end, b)
+                else:
+                    spans.append((row, current_start, current_end))
+                    current_start, current_end = a, b
+            spans.append((row, current_start, current_end))
+        return spans
+
+    @staticmethod
+    def rasterize_lines_batch(segments, algorithm: str = "bresenham_line"):
+        # segments - массив (N, 4) из концов отрезков (x1, y1, x2, y2).
+        # Возвращает (xs, ys, offsets): точки отрезка i лежат в
+        # xs[offsets[i]:offsets[i + 1]], ys[offsets[i]:offsets[i + 1]]
+        # в том же порядке, что и у соответствующего скалярного метода.
+        if np is None:
+            raise ImportError("Для пакетной растеризации требуется NumPy")
+        if algorithm not in LINE_ALGORITHMS:
+            raise ValueError(f"Неизвестный алгоритм: {algorithm}")
+
+        segments = np.asarray(segments, dtype=np.int64)
+        if segments.ndim != 2 or segments.shape[1] != 4:
+            raise ValueError("Ожидается массив отрезков формы (N, 4)")
+
+        x1, y1, x2, y2 = segments.T
+        dx = x2 - x1
+        dy = y2 - y1
+        steps = np.maximum(np.abs(dx), np.abs(dy))
+        counts = steps + 1
+
+        offsets = np.zeros(len(segments) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        total = int(offsets[-1])
+
+        xs = np.empty(total, dtype=np.int64)
+        ys = np.empty(total, dtype=np.int64)
+        if total == 0:
+            return xs, ys, offsets
+
+        if algorithm == "bresenham_line":
+            # Смещение по неосновной оси на шаге k выражается через k
+            # напрямую, поэтому все шаги группы отрезков считаются разом.
+            # Группы примерно по _BATCH_CHUNK_STEPS точек держат
+            # промежуточные массивы небольшими.
+            bounds = _chunk_bounds(offsets, _BATCH_CHUNK_STEPS)
+            for a, b in zip(bounds[:-1], bounds[1:]):
+                xs[offsets[a]:offsets[b]], ys[offsets[a]:offsets[b]] = \
+                    _bresenham_chunk(segments[a:b], counts[a:b])
+            return xs, ys, offsets
+
+        # У step и dda точка зависит от накопленной суммы float, поэтому
+        # шаги идут циклом, а векторизация - по всем отрезкам сразу.
+        # Отрезки отсортированы по убыванию длины, на шаге k активны
+        # первые active[k] из них. Шаг общего цикла стоит несколько вызовов
+        # NumPy независимо от числа активных отрезков, поэтому цикл идет,
+        # пока их не меньше _BATCH_MIN_ACTIVE. Оставшиеся шаги немногих
+        # длинных отрезков досчитываются скалярным line_range, и время
+        # ограничено длиной _BATCH_MIN_ACTIVE-го по длине отрезка плюс
+        # суммой длин более длинных.
+        order = np.argsort(-steps, kind="stable")
+        steps_sorted = steps[order]
+        start = offsets[:-1][order]
+        active = np.searchsorted(-steps_sorted, -np.arange(int(steps_sorted[0]) + 1),
+                                 side="right")
+        shared = int(np.count_nonzero(active >= _BATCH_MIN_ACTIVE))
+
+        safe_steps = np.maximum(steps_sorted, 1)
+        x_increment = dx[order] / safe_steps
+        y_increment = dy[order] / safe_steps
+        x = x1[order].astype(np.float64)
+        y = y1[order].astype(np.float64)
+
+        for k in range(shared):
+            n = active[k]
+            position = start[:n] + k
+            if algorithm == "step":
+                xs[position] = np.rint(x[:n])
+                ys[position] = np.rint(y[:n])
+            else:
+                xs[position] = x[:n] + 0.5
+                ys[position] = y[:n] + 0.5
+            x[:n] += x_increment[:n]
+            y[:n] += y_increment[:n]
+
+        for i in np.flatnonzero(steps_sorted >= shared).tolist():
+            segment = segments[order[i]].tolist()
+            tail = RasterAlgorithms.line_range(algorithm, *segment, shared, int(steps_sorted[i]))
+            points = np.array(tail, dtype=np.int64).reshape(-1, 2)
+            position = int(start[i]) + shared
+            xs[position:position + len(points)] = points[:, 0]
+            ys[position:position + len(points)] = points[:, 1]
+
+        # Вырожденный отрезок скалярные методы возвращают без округления
+        single = steps == 0
+        xs[offsets[:-1][single]] = x1[single]
+        ys[offsets[:-1][single]] = y1[single]
+
+        return xs, ys, offsets
+
+    @staticmethod
+    def wu_lines_batch(segments, chunk_steps: int = 1 << 16, value: Optional[int] = None):
+        # Пакетный вариант wu_line: (xs, ys, weights, offsets), точки отрезка
+        # i - в срезе offsets[i]:offsets[i + 1], в том же порядке, что у
+        # wu_line. Числитель дроби на шаге k - остаток k * minor / major,
+        # поэтому все шаги считаются разом, без цикла по шагам. Отрезки
+        # обрабатываются группами примерно по chunk_steps шагов, чтобы
+        # промежуточные массивы оставались в кэше процессора. С value вместо
+        # покрытий возвращаются целые уровни value * покрытие с округлением,
+        # как в RasterBuffer.wu_line.
+        if np is None:
+            raise ImportError("Для пакетной растеризации требуется NumPy")
+
+        segments = np.asarray(segments, dtype=np.int64)
+        if segments.ndim != 2 or segments.shape[1] != 4:
+            raise ValueError("Ожидается массив отрезков формы (N, 4)")
+
+        steps = np.maximum(np.abs(segments[:, 2] - segments[:, 0]),
+                           np.abs(segments[:, 3] - segments[:, 1]))
+        starts = np.zeros(len(segments) + 1, dtype=np.int64)
+        np.cumsum(steps + 1, out=starts[1:])
+        bounds = _chunk_bounds(starts, chunk_steps)
+
+        parts = [_wu_chunk(segments[a:b], value) for a, b in zip(bounds[:-1], bounds[1:])]
+        counts = [part[3] for part in parts] or [np.empty(0, dtype=np.int64)]
+        offsets = np.zeros(len(segments) + 1, dtype=np.int64)
+        np.cumsum(np.concatenate(counts), out=offsets[1:])
+        if not parts:
+            empty = np.empty(0, dtype=np.int64)
+            weights = np.empty(0, dtype=np.float64 if value is None else np.int64)
+            return empty, empty.copy(), weights, offsets
+        return (np.concatenate([part[0] for part in parts]),
+                np.concatenate([part[1] for part in parts]),
+                np.concatenate([part[2] for part in parts]),
+                offsets)
+
+    @staticmethod
+    def rasterize_lines_parallel(segments, algorithm: str = "bresenham_line",
+                                 workers: Optional[int] = None, chunk_size: int = 65536):
+        # Параллельный вариант rasterize_lines_batch: отрезки делятся на блоки
+        # по chunk_size и обрабатываются пулом процессов. Результат тот же,
+        # что у rasterize_lines_batch, и не зависит от числа процессов.
+        if algorithm not in LINE_ALGORITHMS:
+            raise ValueError(f"Неизвестный алгоритм: {algorithm}")
+        segments = RasterAlgorithms._primitive_array(segments, 4)
+        results = RasterAlgorithms._run_parallel("lines", segments, algorithm,
+                                                 None, workers, chunk_size)
+        return RasterAlgorithms._merge_chunks(results)
+
+    @staticmethod
+    def rasterize_circles_parallel(circles, workers: Optional[int] = None,
+                                   chunk_size: int = 4096):
+        # circles - массив (N, 3) из (xc, yc, r). Возвращает (xs, ys, offsets)
+        # с точками каждой окружности в порядке bresenham_circle.
+        circles = RasterAlgorithms._primitive_array(circles, 3)
+        results = RasterAlgorithms._run_parallel("circles", circles, None,
+                                                 None, workers, chunk_size)
+        return RasterAlgorithms._merge_chunks(results)
+
+    @staticmethod
+    def rasterize_parallel(width: int, height: int, segments=None, circles=None,
+                           algorithm: str = "bresenham_line",
+                           workers: Optional[int] = None, chunk_size: int = 65536,
+                           circle_chunk_size: int = 4096):
+        # Растеризация большого набора отрезков и окружностей в кадровый буфер
+        # height x width (uint8, 1 - закрашенная клетка). Процессы пишут в
+        # общий файл, отображенный в память; все записи одинаковы, поэтому
+        # результат не зависит от порядка выполнения блоков.
+        if algorithm not in LINE_ALGORITHMS:
+            raise ValueError(f"Неизвестный алгоритм: {algorithm}")
+        if np is None:
+            raise ImportError("Для параллельной растеризации требуется NumPy")
+
+        handle, path = tempfile.mkstemp(suffix=".raster")
+        os.close(handle)
+        try:
+            data = np.memmap(path, dtype=np.uint8, mode="w+", shape=(height, width))
+            data.flush()
+            target = (path, height, width)
+
+            if segments is not None:
+                segments = RasterAlgorithms._primitive_array(segments, 4)
+                RasterAlgorithms._run_parallel("lines", segments, algorithm,
+                                               target, workers, chunk_size)
+            if circles is not None:
+                circles = RasterAlgorithms._primitive_array(circles, 3)
+                RasterAlgorithms._run_parallel("circles", circles, None, target,
+                                               workers, circle_chunk_size)
+
+            result = np.array(data)
+            del data
+            return result
+        finally:
+            os.remove(path)
+
+    @staticmethod
+    def _primitive_array(items, columns: int):
+        if np is None:
+            raise ImportError("Для параллельной растеризации требуется NumPy")
+        items = np.asarray(items, dtype=np.int64)
+        if items.ndim != 2 or items.shape[1] != columns:
+            raise ValueError(f"Ожидается массив формы (N, {columns})")
+        return items
+
+    @staticmethod
+    def _run_parallel(kind, items, algorithm, target, workers, chunk_size):
+        if chunk_size <= 0:
+            raise ValueError("Размер блока должен быть положительным")
+        tasks = [(kind, items[i:i + chunk_size], algorithm, target)
+                 for i in range(0, len(items), chunk_size)]
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = min(workers, len(tasks))
+
+        if workers <= 1:
+            return [_parallel_task(task) for task in tasks]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(_parallel_task, tasks))
+
+    @staticmethod
+    def _merge_chunks(results):
+        # Склеивает (xs, ys, offsets) блоков в порядке исходного набора
+        if not results:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty.copy(), np.zeros(1, dtype=np.int64)
+
+        xs = np.concatenate([chunk[0] for chunk in results])
+        ys = np.concatenate([chunk[1] for chunk in results])
+        offsets = [np.zeros(1, dtype=np.int64)]
+        shift = 0
+        for chunk in results:
+            offsets.append(chunk[2][1:] + shift)
+            shift += chunk[2][-1]
+        return xs, ys, np.concatenate(offsets)
+
+class RasterBuffer:
+    # Кадровый буфер width x height, в который алгоритмы пишут напрямую,
+    # без промежуточного списка точек. Точки вне буфера отсекаются.
+    # Хранилище - bytearray по строкам (y * width + x) или двумерный
+    # массив NumPy формы (height, width), например uint8 или uint32.
+
+    def __init__(self, width: int, height: int, data=None):
+        if width <= 0 or height <= 0:
+            raise ValueError("Размеры буфера должны быть положительными")
+        if data is None:
+            data = bytearray(width * height)
+
+        self.is_array = np is not None and isinstance(data, np.ndarray)
+        if self.is_array:
+            if data.shape != (height, width):
+                raise ValueError(f"Ожидается массив формы ({height}, {width})")
+        elif len(data) != width * height:
+            raise ValueError(f"Ожидается буфер длины {width * height}")
+
+        self.width = width
+        self.height = height
+        self.data = data
+
+    def clear(self, value: int = 0):
+        if self.is_array:
+            self.data.fill(value)
+        else:
+            self.data[:] = bytes([value]) * len(self.data)
+
+    def get(self, x: int, y: int) -> int:
+        if self.is_array:
+            return int(self.data[y, x])
+        return self.data[y * self.width + x]
+
+    def points(self) -> List[Tuple[int, int]]:
+        if self.is_array:
+            ys, xs = np.nonzero(self.data)
+            return list(zip(xs.tolist(), ys.tolist()))
+        w = self.width
+        return [(i % w, i // w) for i, v in enumerate(self.data) if v]
+
+    def plot(self, points: Iterable[Tuple[int, int]], value: int = 1):
+        # Запись готового списка точек, например результата алгоритма
+        data = self.data
+        w = self.width
+        h = self.height
+        is_array = self.is_array
+
+        for x, y in points:
+            if 0 <= x < w and 0 <= y < h:
+                if is_array:
+                    data[y, x] = value
+                else:
+                    data[y * w + x] = value
+
+    def rows(self) -> Iterator[bytes]:
+        # Строки буфера сверху вниз, по байту на клетку (значения 0..255)
+        w = self.width
+        if self.is_array:
+            for row in self.data:
+                yield row.astype(np.uint8).tobytes()
+        else:
+            for start in range(0, len(self.data), w):
+                yield bytes(self.data[start:start + w])
+
+    def line(self, x1: int, y1: int, x2: int, y2: int,
+             algorithm: str = "bresenham_line", value: int = 1):
+        # Сначала отрезок отсекается по буферу, так что работа зависит от
+        # размеров буфера, а не от длины отрезка
+        data = self.data
+        w = self.width
+        steps = RasterAlgorithms.clip_line(algorithm, x1, y1, x2, y2,
+                                           (0, 0, w - 1, self.height - 1))
+        if steps is None:
+            return
+        k_start, k_end = steps
+        count = k_end - k_start + 1
+
+        if self.is_array:
+            # Видимых точек не больше, чем клеток в строке или столбце
+            self._plot_visible(RasterAlgorithms.line_range(algorithm, x1, y1, x2, y2,
+                                                           k_start, k_end), value)
+            return
+
+        if algorithm == "bresenham_line":
+            dx = abs(x2 - x1)
+            dy = abs(y2 - y1)
+            sx = 1 if x1 < x2 else -1
+            sy = 1 if y1 < y2 else -1
+            x, y, err = _bresenham_state(x1, y1, x2, y2, k_start)
+
+            for _ in range(count):
+                data[y * w + x] = value
+                e2 = 2 * err
+                if e2 > -dy:
+                    err -= dy
+                    x += sx
+                if e2 < dx:
+                    err += dx
+                    y += sy
+            return
+
+        dx = x2 - x1
+        dy = y2 - y1
+        steps = max(abs(dx), abs(dy))
+
+        if steps == 0:
+            data[y1 * w + x1] = value
+            return
+
+        x_increment = dx / steps
+        y_increment = dy / steps
+        x = _float_advance(float(x1), x_increment, k_start)
+        y = _float_advance(float(y1), y_increment, k_start)
+
+        if algorithm == "step":
+            for _ in range(count):
+                data[round(y) * w + round(x)] = value
+                x += x_increment
+                y += y_increment
+        else:
+            for _ in range(count):
+                data[int(y + 0.5) * w + int(x + 0.5)] = value
+                x += x_increment
+                y += y_increment
+
+    def lines(self, segments, algorithm: str = "bresenham_line", value: int = 1):
+        # Пакетная запись через rasterize_lines_batch (требуется NumPy).
+        # Отрезки длиннее периметра буфера пишутся через line с отсечением,
+        # так что работа не зависит от их длины.
+        if np is None:
+            raise ImportError("Для пакетной растеризации требуется NumPy")
+        segments = np.asarray(segments, dtype=np.int64)
+        if segments.ndim == 2 and segments.shape[1] == 4:
+            steps = np.maximum(np.abs(segments[:, 2] - segments[:, 0]),
+                               np.abs(segments[:, 3] - segments[:, 1]))
+            long = steps > 2 * (self.width + self.height)
+            for segment in segments[long].tolist():
+                self.line(*segment, algorithm, value)
+            segments = segments[~long]
+        xs, ys, _ = RasterAlgorithms.rasterize_lines_batch(segments, algorithm)
+        self._put(xs, ys, value)
+
+    def circle(self, xc: int, yc: int, r: int, value: int = 1):
+        # Ветви окружности отсекаются по буферу заранее, как в clipped_circle
+        self._plot_visible(RasterAlgorithms.clipped_circle(
+            xc, yc, r, (0, 0, self.width - 1, self.height - 1)), value)
+
+    def ellipse(self, xc: int, yc: int, a: int, b: int, value: int = 1):
+        # Четверть вычисляется один раз, в буфер пишутся все четыре
+        # отражения; повторная запись точек на осях безвредна
+        xs, ys = _ellipse_quadrant(a, b) if a >= 0 and b >= 0 else ([], [])
+        for x, y in zip(xs, ys):
+            self.plot(((xc + x, yc + y), (xc - x, yc + y),
+                       (xc + x, yc - y), (xc - x, yc - y)), value)
+
+    def fill_spans(self, spans: Iterable[Tuple[int, int, int]], value: int = 1):
+        # Серия (y, x_start, x_end) записывается одним присваиванием среза
+        data = self.data
+        w = self.width
+        h = self.height
+        fill = None if self.is_array else memoryview(bytes([value]) * w)
+
+        for y, a, b in spans:
+            if not 0 <= y < h:
+                continue
+            a = max(a, 0)
+            b = min(b, w - 1)
+            if a > b:
+                continue
+            if fill is None:
+                data[y, a:b + 1] = value
+            else:
+                start = y * w
+                data[start + a:start + b + 1] = fill[:b - a + 1]
+
+    def polygon(self, vertices: Iterable[Tuple[int, int]], value: int = 1,
+                nonzero: bool = False):
+        viewport = (0, 0, self.width - 1, self.height - 1)
+        self.fill_spans(RasterAlgorithms.polygon_spans(vertices, viewport, nonzero), value)
+
+    def filled_circle(self, xc: int, yc: int, r: int, value: int = 1):
+        viewport = (0, 0, self.width - 1, self.height - 1)
+        self.fill_spans(RasterAlgorithms.filled_circle_spans(xc, yc, r, viewport), value)
+
+    def arc(self, xc: int, yc: int, r: int, start: float, end: float, value: int = 1):
+        self.plot(RasterAlgorithms.circle_arc(xc, yc, r, start, end), value)
+
+    def ellipse_arc(self, xc: int, yc: int, a: int, b: int,
+                    start: float, end: float, value: int = 1):
+        self.plot(RasterAlgorithms.ellipse_arc(xc, yc, a, b, start, end), value)
+
+    def wu_line(self, x1: int, y1: int, x2: int, y2: int, value: int = 255):
+        # Сглаженный отрезок прямо в буфер: в клетку пишется value * покрытие.
+        # При наложении остается большее значение, чтобы пересечения не
+        # пересвечивались. Массив NumPy заполняется через wu_lines по тому же
+        # правилу округления.
+        if self.is_array:
+            self.wu_lines([(x1, y1, x2, y2)], value)
+            return
+
+        data = self.data
+        w = self.width
+        h = self.height
+
+        dx = x2 - x1
+        dy = y2 - y1
+        adx = abs(dx)
+        ady = abs(dy)
+        sx = 1 if dx >= 0 else -1
+        sy = 1 if dy >= 0 else -1
+
+        # Основная ось - u, неосновная - v; индекс клетки в буфере меняется
+        # на step_u и step_v при шаге по ним
+        if adx >= ady:
+            major, minor = adx, ady
+            u, v, u_size, v_size = x1, y1, w, h
+            step_u, step_v, su, sv = sx, sy * w, sx, sy
+        else:
+            major, minor = ady, adx
+            u, v, u_size, v_size = y1, x1, h, w
+            step_u, step_v, su, sv = sy * w, sx, sy, sx
+
+        # Уровень внешней точки value * err / major с округлением ведется
+        # целым числителем level_num = 2 * value * err + major, так что на
+        # шаг приходится одно целочисленное деление. Внутренняя точка
+        # получает остаток value - level: сумма пары равна value.
+        i = y1 * w + x1
+        err = 0
+        two_major = 2 * major
+        level_num = major
+        level_step = 2 * value * minor
+        level_wrap = 2 * value * major
+
+        for _ in range(major + 1):
+            if 0 <= u < u_size:
+                level = level_num // two_major if two_major else 0
+                if 0 <= v < v_size and value - level > data[i]:
+                    data[i] = value - level
+                if err and 0 <= v + sv < v_size and level > data[i + step_v]:
+                    data[i + step_v] = level
+            u += su
+            i += step_u
+            err += minor
+            level_num += level_step
+            if err >= major:
+                err -= major
+                v += sv
+                i += step_v
+                level_num -= level_wrap
+
+    def wu_lines(self, segments, value: int = 255):
+        # Пакетная запись через wu_lines_batch (требуется NumPy). В целое
+        # хранилище пишутся уровни, округленные в целых так же, как в wu_line
+        if self.is_array and self.data.dtype.kind not in "iu":
+            xs, ys, ws, _ = RasterAlgorithms.wu_lines_batch(segments)
+            self._put_coverage(xs, ys, ws, value)
+            return
+        xs, ys, levels, _ = RasterAlgorithms.wu_lines_batch(segments, value=value)
+        self._put_levels(xs, ys, levels)
+
+    def wu_circle(self, xc: int, yc: int, r: int, value: int = 255):
+        if self.is_array:
+            self._put_coverage(*RasterAlgorithms.wu_circle_arrays(xc, yc, r), value)
+            return
+
+        data = self.data
+        w = self.width
+        h = self.height
+        for px, py, coverage in RasterAlgorithms.wu_circle(xc, yc, r):
+            if 0 <= px < w and 0 <= py < h:
+                level = int(value * coverage + 0.5)
+                i = py * w + px
+                if level > data[i]:
+                    data[i] = level
+
+    def _put_coverage(self, xs, ys, ws, value):
+        levels = value * ws
+        if not self.is_array or self.data.dtype.kind in "iu":
+            levels = np.floor(levels + 0.5)
+        self._put_levels(xs, ys, levels)
+
+    def _put_levels(self, xs, ys, levels):
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        xs = xs[inside]
+        ys = ys[inside]
+        levels = levels[inside]
+
+        if self.is_array:
+            target = self.data
+            np.maximum.at(target, (ys, xs), levels.astype(target.dtype))
+        else:
+            flat = np.frombuffer(self.data, dtype=np.uint8)
+            np.maximum.at(flat, ys * self.width + xs, levels.astype(np.uint8))
+
+    def _plot_visible(self, points: List[Tuple[int, int]], value: int):
+        # Запись точек, которые уже отсечены по буферу
+        if not points:
+            return
+        if self.is_array:
+            xs, ys = zip(*points)
+            self.data[list(ys), list(xs)] = value
+            return
+        data = self.data
+        w = self.width
+        for x, y in points:
+            data[y * w + x] = value
+
+    def _put(self, xs, ys, value):
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        xs = xs[inside]
+        ys = ys[inside]
+        if self.is_array:
+            self.data[ys, xs] = value
+        else:
+            flat = np.frombuffer(self.data, dtype=np.uint8)
+            flat[ys * self.width + xs] = value
+
+
+class RasterCache:
+    # Ограниченный по памяти LRU-кэш результатов растеризации. Точки
+    # хранятся смещениями от начальной точки (отрезок) или от центра
+    # (окружность) в компактных массивах, так что запись переиспользуется
+    # для любой позиции примитива:
+    #   bresenham_line   - ключ (dx, dy): алгоритм целочисленный, результат
+    #                      не зависит от положения отрезка;
+    #   bresenham_circle - ключ r;
+    #   step, dda        - ключ по всем координатам: накопление приращений
+    #                      во float и округление зависят от x1, y1, поэтому
+    #                      сдвинутый отрезок может растеризоваться иначе.
+
+    rasterizers = {
+        "step": RasterAlgorithms.step_by_step,
+        "dda": RasterAlgorithms.dda,
+        "bresenham_line": RasterAlgorithms.bresenham_line,
+    }
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        if max_bytes <= 0:
+            raise ValueError("Размер кэша должен быть положительным")
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[tuple, Tuple[array, array, int]]" = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def line(self, algorithm: str, x1: int, y1: int, x2: int, y2: int,
+             viewport: Optional[Viewport] = None) -> List[Tuple[int, int]]:
+        if algorithm not in LINE_ALGORITHMS:
+            raise ValueError(f"Неизвестный алгоритм: {algorithm}")
+        if algorithm == "bresenham_line":
+            key = (algorithm, x2 - x1, y2 - y1)
+        else:
+            key = (algorithm, x1, y1, x2, y2)
+
+        entry = self._lookup(key)
+        if entry is None:
+            if viewport is not None:
+                # Без полного результата в кэше строится только видимая
+                # часть, а не весь отрезок
+                return RasterAlgorithms.clipped_line(algorithm, x1, y1, x2, y2, viewport)
+            points = self.rasterizers[algorithm](x1, y1, x2, y2)
+            self._store(key, points, x1, y1)
+            return points
+
+        xs, ys, _ = entry
+        start, stop = 0, len(xs)
+        if viewport is not None:
+            steps = RasterAlgorithms.clip_line(algorithm, x1, y1, x2, y2, viewport)
+            if steps is None:
+                return []
+            start, stop = steps[0], steps[1] + 1
+        return self._translate(xs, ys, x1, y1, start, stop)
+
+    def circle(self, xc: int, yc: int, r: int,
+               viewport: Optional[Viewport] = None) -> List[Tuple[int, int]]:
+        key = ("bresenham_circle", r)
+
+        entry = self._lookup(key)
+        if entry is None:
+            if viewport is not None:
+                return RasterAlgorithms.bresenham_circle(xc, yc, r, viewport)
+            points = RasterAlgorithms.bresenham_circle(xc, yc, r)
+            self._store(key, points, xc, yc)
+            return points
+
+        xs, ys, _ = entry
+        points = self._translate(xs, ys, xc, yc, 0, len(xs))
+        if viewport is not None:
+            x_min, y_min, x_max, y_max = viewport
+            points = [(x, y) for x, y in points
+                      if x_min <= x <= x_max and y_min <= y <= y_max]
+        return points
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+        }
+
+    def clear(self):
+        self.entries.clear()
+        self.size = 0
+
+    def _lookup(self, key: tuple):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    @staticmethod
+    def _translate(xs: array, ys: array, x0: int, y0: int,
+                   start: int, stop: int) -> List[Tuple[int, int]]:
+        # Сдвиг сохраненных смещений в точку (x0, y0). Сборка кортежей -
+        # основная цена попадания, с NumPy она заметно дешевле
+        if np is not None:
+            px = (np.frombuffer(xs, dtype=np.int64)[start:stop] + x0).tolist()
+            py = (np.frombuffer(ys, dtype=np.int64)[start:stop] + y0).tolist()
+            return list(zip(px, py))
+        return [(x + x0, y + y0) for x, y in zip(xs[start:stop], ys[start:stop])]
+
+    def _store(self, key: tuple, points: List[Tuple[int, int]], x0: int, y0: int):
+        xs = array("q", [x - x0 for x, _ in points])
+        ys = array("q", [y - y0 for _, y in points])
+        size = sys.getsizeof(xs) + sys.getsizeof(ys) + sys.getsizeof(key)
+        if size > self.max_bytes:
+            return
+
+        self.entries[key] = (xs, ys, size)
+        self.size += size
+        while self.size > self.max_bytes:
+            _, (_, _, evicted) = self.entries.popitem(last=False)
+            self.size -= evicted
+            self.evictions += 1
+
+
+class RasterTrace:
+    # Запись переменных алгоритма во время растеризации: постоянные
+    # величины (приращения, начальная ошибка) и по шагам - состояние перед
+    # шагом в компактных массивах array. Записывается не больше limit
+    # шагов, так что память не зависит от длины примитива; total - число
+    # выполненных шагов.
+
+    def __init__(self, limit: int = 1000):
+        self.limit = max(0, limit)
+        self.start(None, {})
+
+    def start(self, algorithm: Optional[str], columns: Dict[str, str], **values):
+        # columns: имя -> код типа array ("q" - целое, "d" - float). Целые
+        # вне диапазона int64 хранятся в обычном списке.
+        wide = any(isinstance(value, int) and abs(value) >= 2 ** 60
+                   for value in values.values())
+        self.algorithm = algorithm
+        self.values = values
+        self.columns = {name: [] if wide and code == "q" else array(code)
+                        for name, code in columns.items()}
+        self.total = 0
+
+    def start_line(self, algorithm: str, x1: int, y1: int, x2: int, y2: int):
+        dx = x2 - x1
+        dy = y2 - y1
+        if algorithm == "bresenham_line":
+            self.start(algorithm, {"k": "q", "x": "q", "y": "q", "err": "q"},
+                       x1=x1, y1=y1, x2=x2, y2=y2, dx=abs(dx), dy=abs(dy),
+                       err0=abs(dx) - abs(dy))
+            return
+        steps = max(abs(dx), abs(dy))
+        self.start(algorithm, {"k": "q", "x": "d", "y": "d", "px": "q", "py": "q"},
+                   x1=x1, y1=y1, x2=x2, y2=y2, dx=dx, dy=dy, steps=steps,
+                   x_increment=dx / steps if steps else 0.0,
+                   y_increment=dy / steps if steps else 0.0)
+
+    def room(self) -> int:
+        return self.limit - len(self)
+
+    def __len__(self) -> int:
+        for column in self.columns.values():
+            return len(column)
+        return 0
+
+    def rows(self) -> Iterator[Dict[str, float]]:
+        names = list(self.columns)
+        for values in zip(*self.columns.values()):
+            yield dict(zip(names, values))
+
+    def nbytes(self) -> int:
+        return sum(len(column) * (column.itemsize if isinstance(column, array) else 8)
+                   for column in self.columns.values())
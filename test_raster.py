@@ -0,0 +1,90 @@
+"""
+Лабораторная работа 4: Базовые растровые алгоритмы
+Проверка целочисленного ЦДА на случайных отрезках
+"""
+
+import random
+import unittest
+from fractions import Fraction
+
+from raster import RasterAlgorithms
+
+
+def exact_line(algorithm, x1, y1, x2, y2):
+    # Эталон: точная координата x1 + k * dx / steps в рациональных числах,
+    # округленная по правилу соответствующего вещественного алгоритма
+    dx = x2 - x1
+    dy = y2 - y1
+    steps = max(abs(dx), abs(dy))
+    if steps == 0:
+        return [(x1, y1)]
+
+    if algorithm == "step":
+        rounding = round
+    else:
+        rounding = lambda value: int(value + Fraction(1, 2))
+
+    return [(rounding(x1 + Fraction(k * dx, steps)), rounding(y1 + Fraction(k * dy, steps)))
+            for k in range(steps + 1)]
+
+
+def random_segments(rng, count, low, high, length):
+    # Отрезки со случайным началом в [low, high] и длиной до length по осям
+    segments = []
+    for _ in range(count):
+        x1 = rng.randint(low, high)
+        y1 = rng.randint(low, high)
+        segments.append((x1, y1, x1 + rng.randint(-length, length),
+                         y1 + rng.randint(-length, length)))
+    return segments
+
+
+class FixedPointLineTest(unittest.TestCase):
+    METHODS = {
+        "step": (RasterAlgorithms.step_by_step_fixed, RasterAlgorithms.step_by_step),
+        "dda": (RasterAlgorithms.dda_fixed, RasterAlgorithms.dda),
+    }
+
+    def setUp(self):
+        self.rng = random.Random(20240406)
+
+    def corpus(self):
+        rng = self.rng
+        segments = random_segments(rng, 1000, -2000, 2000, 300)
+        # Координаты порядка 2^31, где шаг сетки float уже заметен
+        segments += random_segments(rng, 100, 2 ** 31 - 5000, 2 ** 31 + 5000, 1000)
+        segments += random_segments(rng, 100, -2 ** 31 - 5000, -2 ** 31 + 5000, 1000)
+        # Вырожденные, осевые, диагональные и с точной половиной
+        segments += [(3, 4, 3, 4), (0, 0, 10, 0), (0, 0, 0, -10), (0, 0, 7, 7),
+                     (0, 0, -7, 7), (0, 0, 4, 1), (0, 0, -4, -1), (1, 0, 5, -2),
+                     (2 ** 31, -2 ** 31, 2 ** 31 - 6, -2 ** 31 + 3)]
+        return segments
+
+    def test_matches_exact_reference(self):
+        for algorithm, (fixed, _) in self.METHODS.items():
+            for segment in self.corpus():
+                with self.subTest(algorithm=algorithm, segment=segment):
+                    self.assertEqual(fixed(*segment), exact_line(algorithm, *segment))
+
+    def test_differs_from_float_by_at_most_one_pixel(self):
+        # По основной оси приращение равно 1.0 и вычисляется точно, по
+        # неосновной накопленная ошибка float может перевести значение через
+        # границу округления лишь на одну клетку и лишь в редких точках
+        for algorithm, (fixed, floating) in self.METHODS.items():
+            total = 0
+            differing = 0
+            for segment in self.corpus():
+                expected = floating(*segment)
+                points = fixed(*segment)
+                self.assertEqual(len(points), len(expected), segment)
+                for (x, y), (fx, fy) in zip(points, expected):
+                    self.assertLessEqual(abs(x - fx), 1, segment)
+                    self.assertLessEqual(abs(y - fy), 1, segment)
+                    differing += (x, y) != (fx, fy)
+                total += len(points)
+            with self.subTest(algorithm=algorithm):
+                self.assertLess(differing, total * 0.01)
+
+
+if __name__ == "__main__":
+    unittest.main()
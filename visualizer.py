@@ -0,0 +1,769 @@
+"""
+Лабораторная работа 4: Базовые растровые алгоритмы
+Графический интерфейс для визуализации алгоритмов растеризации
+"""
+
+import tkinter as tk
+from tkinter import ttk, messagebox, scrolledtext, filedialog
+import math
+from typing import Dict, Optional, Tuple
+
+from profiler import PhaseProfiler
+from raster import RasterAlgorithms, RasterBuffer, RasterTrace
+
+
+class RasterVisualizerApp:
+
+    
+    def __init__(self, root):
+        self.root = root
+        self.root.title("Лабораторная работа 4: Базовые растровые алгоритмы")
+        self.root.geometry("1400x900")
+        
+        self.offset_x = 50  
+        self.offset_y = 50  
+        
+        # Область растра на холсте имеет постоянный размер в пикселях, а
+        # видимая часть плоскости задается левой верхней клеткой и уровнем
+        # масштаба (пикселей на клетку, клеток на пиксель). При мелком
+        # масштабе пиксель показывает плотность точек в блоке клеток.
+        self.view_width = 800
+        self.view_height = 600
+        self.zoom_levels = ([(40, 1), (20, 1), (10, 1), (8, 1), (5, 1), (4, 1), (2, 1), (1, 1)]
+                            + [(1, 2 ** i) for i in range(1, 21)])
+        self.zoom_index = 1
+        self.view_x = 0
+        self.view_y = 0
+        self.cell_size, self.block = self.zoom_levels[self.zoom_index]
+        self.grid_width = self.view_width // self.cell_size
+        self.grid_height = self.view_height // self.cell_size
+        self.view_pending = None
+        self.pan_start = None
+        
+        self.algorithms = RasterAlgorithms()
+        
+        # Растр хранится в буфере по клетке на пиксель и выводится на холст
+        # одним изображением: 0 - пусто, 1 - точка, 2 - начало, 3 - конец,
+        # 4..255 - плотность точек в блоке от светлого к темному
+        self.palette = ["#ffffff", "#0000ff", "#008000", "#ff0000"] + [
+            "#%02x%02x%02x" % (round(190 * (1 - t)), round(205 * (1 - t)), round(255 - 95 * t))
+            for t in (i / 251 for i in range(252))]
+        self.algorithm_names = {
+            "step": "Пошаговый алгоритм",
+            "dda": "Алгоритм ЦДА",
+            "bresenham_line": "Алгоритм Брезенхема (отрезок)",
+            "bresenham_circle": "Алгоритм Брезенхема (окружность)",
+        }
+        
+        # Состояние для инкрементального обновления: закрашенные клетки
+        # текущего растра и параметры, по которым он построен
+        self.raster_cells: Dict[Tuple[int, int], int] = {}
+        self.raster_key = None
+        self.update_pending = None
+        self.info_pending = None
+        self.drag_handle = None
+        self.frame_interval = 16  # мс, не чаще ~60 обновлений в секунду
+        self.info_delay = 250  # мс паузы перед обновлением информационной панели
+        self.incremental_limit = 64  # больше изменившихся клеток - полная перерисовка
+        self.trace_limit = 5  # шагов алгоритма, записываемых для пояснений
+        
+        # Время фаз построения: разбор, отсечение, растеризация, вывод, панель
+        self.profiler = PhaseProfiler()
+        
+        self.setup_ui()
+        
+    def setup_ui(self):
+        
+        main_container = ttk.Frame(self.root)
+        main_container.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        left_panel = ttk.Frame(main_container, width=300)
+        left_panel.pack(side=tk.LEFT, fill=tk.BOTH, padx=(0, 10))
+        
+        right_panel = ttk.Frame(main_container)
+        right_panel.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        title_label = ttk.Label(left_panel, text="Параметры алгоритма", 
+                               font=("Arial", 12, "bold"))
+        title_label.pack(pady=10)
+        
+        algo_frame = ttk.LabelFrame(left_panel, text="Выбор алгоритма", padding=10)
+        algo_frame.pack(fill=tk.X, pady=5)
+        
+        self.algorithm_var = tk.StringVar(value="step")
+        
+        for value, text in self.algorithm_names.items():
+            rb = ttk.Radiobutton(algo_frame, text=text, variable=self.algorithm_var, 
+                                value=value, command=self.on_algorithm_change)
+            rb.pack(anchor=tk.W, pady=2)
+        
+        self.line_frame = ttk.LabelFrame(left_panel, text="Параметры отрезка", padding=10)
+        self.line_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(self.line_frame, text="Начальная точка (x1, y1):").pack(anchor=tk.W)
+        point1_frame = ttk.Frame(self.line_frame)
+        point1_frame.pack(fill=tk.X, pady=2)
+        
+        ttk.Label(point1_frame, text="x1:").pack(side=tk.LEFT)
+        self.x1_var = tk.StringVar(value="5")
+        ttk.Entry(point1_frame, textvariable=self.x1_var, width=8).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(point1_frame, text="y1:").pack(side=tk.LEFT)
+        self.y1_var = tk.StringVar(value="5")
+        ttk.Entry(point1_frame, textvariable=self.y1_var, width=8).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(self.line_frame, text="Конечная точка (x2, y2):").pack(anchor=tk.W, pady=(10, 0))
+        point2_frame = ttk.Frame(self.line_frame)
+        point2_frame.pack(fill=tk.X, pady=2)
+        
+        ttk.Label(point2_frame, text="x2:").pack(side=tk.LEFT)
+        self.x2_var = tk.StringVar(value="15")
+        ttk.Entry(point2_frame, textvariable=self.x2_var, width=8).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(point2_frame, text="y2:").pack(side=tk.LEFT)
+        self.y2_var = tk.StringVar(value="12")
+        ttk.Entry(point2_frame, textvariable=self.y2_var, width=8).pack(side=tk.LEFT, padx=5)
+        
+        self.circle_frame = ttk.LabelFrame(left_panel, text="Параметры окружности", padding=10)
+        
+        ttk.Label(self.circle_frame, text="Центр окружности (xc, yc):").pack(anchor=tk.W)
+        center_frame = ttk.Frame(self.circle_frame)
+        center_frame.pack(fill=tk.X, pady=2)
+        
+        ttk.Label(center_frame, text="xc:").pack(side=tk.LEFT)
+        self.xc_var = tk.StringVar(value="20")
+        ttk.Entry(center_frame, textvariable=self.xc_var, width=8).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(center_frame, text="yc:").pack(side=tk.LEFT)
+        self.yc_var = tk.StringVar(value="15")
+        ttk.Entry(center_frame, textvariable=self.yc_var, width=8).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(self.circle_frame, text="Радиус:").pack(anchor=tk.W, pady=(10, 0))
+        radius_frame = ttk.Frame(self.circle_frame)
+        radius_frame.pack(fill=tk.X, pady=2)
+        
+        ttk.Label(radius_frame, text="r:").pack(side=tk.LEFT)
+        self.r_var = tk.StringVar(value="8")
+        ttk.Entry(radius_frame, textvariable=self.r_var, width=8).pack(side=tk.LEFT, padx=5)
+        
+        build_btn = ttk.Button(left_panel, text="Построить", command=self.build_raster)
+        build_btn.pack(pady=10, fill=tk.X)
+        
+        self.live_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(left_panel, text="Перестраивать при изменении параметров",
+                        variable=self.live_var).pack(anchor=tk.W)
+        for var in (self.algorithm_var, self.x1_var, self.y1_var, self.x2_var, self.y2_var,
+                    self.xc_var, self.yc_var, self.r_var):
+            var.trace_add("write", self.on_param_change)
+        
+        view_frame = ttk.LabelFrame(left_panel, text="Вид", padding=10)
+        view_frame.pack(fill=tk.X, pady=5)
+        
+        view_buttons = ttk.Frame(view_frame)
+        view_buttons.pack(fill=tk.X)
+        ttk.Button(view_buttons, text="+", width=3,
+                   command=lambda: self.zoom_by(-1)).pack(side=tk.LEFT)
+        ttk.Button(view_buttons, text="−", width=3,
+                   command=lambda: self.zoom_by(1)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(view_buttons, text="Целиком", command=self.fit_view).pack(side=tk.LEFT)
+        ttk.Button(view_buttons, text="Сброс", command=self.reset_view).pack(side=tk.LEFT, padx=5)
+        
+        self.scale_label = ttk.Label(view_frame, text="")
+        self.scale_label.pack(anchor=tk.W, pady=(5, 0))
+        ttk.Label(view_frame, text="Колесо мыши - масштаб, правая кнопка - сдвиг",
+                  font=("Arial", 8)).pack(anchor=tk.W)
+        
+        profile_frame = ttk.LabelFrame(left_panel, text="Профилирование", padding=10)
+        profile_frame.pack(fill=tk.X, pady=5)
+        
+        self.cprofile_var = tk.BooleanVar(value=False)
+        self.tracemalloc_var = tk.BooleanVar(value=False)
+        profile_options = ttk.Frame(profile_frame)
+        profile_options.pack(fill=tk.X)
+        ttk.Checkbutton(profile_options, text="cProfile", variable=self.cprofile_var,
+                        command=self.on_profiling_change).pack(side=tk.LEFT)
+        ttk.Checkbutton(profile_options, text="tracemalloc", variable=self.tracemalloc_var,
+                        command=self.on_profiling_change).pack(side=tk.LEFT, padx=5)
+        profile_buttons = ttk.Frame(profile_frame)
+        profile_buttons.pack(fill=tk.X, pady=(5, 0))
+        ttk.Button(profile_buttons, text="Экспорт в JSON",
+                   command=self.export_profile).pack(side=tk.LEFT)
+        ttk.Button(profile_buttons, text="Сброс",
+                   command=self.profiler.reset).pack(side=tk.LEFT, padx=5)
+        
+        info_frame = ttk.LabelFrame(left_panel, text="Информация", padding=10)
+        info_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+        
+        self.info_text = scrolledtext.ScrolledText(info_frame, height=10, wrap=tk.WORD)
+        self.info_text.pack(fill=tk.BOTH, expand=True)
+        
+        
+        canvas_frame = ttk.LabelFrame(right_panel, text="Визуализация", padding=5)
+        canvas_frame.pack(fill=tk.BOTH, expand=True)
+        
+        self.canvas = tk.Canvas(canvas_frame, bg="white", 
+                               width=self.view_width + self.offset_x * 2,
+                               height=self.view_height + self.offset_y * 2)
+        
+        h_scrollbar = ttk.Scrollbar(canvas_frame, orient=tk.HORIZONTAL, command=self.canvas.xview)
+        v_scrollbar = ttk.Scrollbar(canvas_frame, orient=tk.VERTICAL, command=self.canvas.yview)
+        
+        self.canvas.configure(xscrollcommand=h_scrollbar.set, yscrollcommand=v_scrollbar.set)
+        
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        h_scrollbar.grid(row=1, column=0, sticky="ew")
+        v_scrollbar.grid(row=0, column=1, sticky="ns")
+        
+        canvas_frame.grid_rowconfigure(0, weight=1)
+        canvas_frame.grid_columnconfigure(0, weight=1)
+        
+        self.canvas.configure(scrollregion=(0, 0, 
+                                           self.view_width + self.offset_x * 2,
+                                           self.view_height + self.offset_y * 2))
+        
+        self.canvas.bind("<ButtonPress-1>", self.on_drag_start)
+        self.canvas.bind("<B1-Motion>", self.on_drag)
+        self.canvas.bind("<ButtonRelease-1>", self.on_drag_end)
+        for button in ("2", "3"):
+            self.canvas.bind(f"<ButtonPress-{button}>", self.on_pan_start)
+            self.canvas.bind(f"<B{button}-Motion>", self.on_pan)
+            self.canvas.bind(f"<ButtonRelease-{button}>", self.on_pan_end)
+        self.canvas.bind("<MouseWheel>", self.on_wheel)
+        self.canvas.bind("<Button-4>", self.on_wheel)
+        self.canvas.bind("<Button-5>", self.on_wheel)
+        
+        self.on_algorithm_change()
+        self.setup_raster_layer()
+        self.draw_grid()
+        self.update_scale_label()
+        
+    def on_algorithm_change(self):
+        if self.algorithm_var.get() == "bresenham_circle":
+            self.line_frame.pack_forget()
+            self.circle_frame.pack(fill=tk.X, pady=5)
+        else:
+            self.circle_frame.pack_forget()
+            self.line_frame.pack(fill=tk.X, pady=5)
+    
+    def setup_raster_layer(self):
+        # Изображение размером с сетку и его копия, увеличенная до размера
+        # клеток. Оно лежит под линиями сетки, так что границы клеток видны.
+        # Пересоздается при смене масштаба вместе с буфером.
+        self.raster_buffer = RasterBuffer(self.grid_width, self.grid_height)
+        self.raster_cells = {}
+        self.raster_source = tk.PhotoImage(width=self.grid_width, height=self.grid_height)
+        self.raster_image = tk.PhotoImage(width=self.grid_width * self.cell_size,
+                                          height=self.grid_height * self.cell_size)
+        self.canvas.delete("raster")
+        self.canvas.create_image(self.offset_x, self.offset_y, image=self.raster_image,
+                                 anchor=tk.NW, tags="raster")
+        self.canvas.tag_lower("raster")
+    
+    def draw_grid(self):
+        # Сетка и подписи зависят только от видимой области: они
+        # перерисовываются при сдвиге и масштабировании, но не при построении
+        self.canvas.delete("grid")
+        right = self.offset_x + self.view_width
+        bottom = self.offset_y + self.view_height
+        
+        # Линии клеток - только пока клетки достаточно крупные
+        if self.cell_size >= 5:
+            for i in range(self.grid_width + 1):
+                x = self.offset_x + i * self.cell_size
+                self.canvas.create_line(x, self.offset_y, x, bottom,
+                                       fill="#dddddd", width=1, tags="grid")
+            for i in range(self.grid_height + 1):
+                y = self.offset_y + i * self.cell_size
+                self.canvas.create_line(self.offset_x, y, right, y,
+                                       fill="#dddddd", width=1, tags="grid")
+        else:
+            self.canvas.create_rectangle(self.offset_x, self.offset_y, right, bottom,
+                                         outline="#dddddd", tags="grid")
+        
+        # Подписи координат не чаще чем через 100 пикселей
+        step = self.label_step()
+        scale = self.cell_size / self.block
+        
+        x_first = -(-self.view_x // step) * step
+        for value in range(x_first, self.view_x + self.grid_width * self.block + 1, step):
+            x = self.offset_x + (value - self.view_x) * scale
+            self.canvas.create_text(x, self.offset_y - 10, text=str(value),
+                                   font=("Arial", 8), tags="grid")
+        
+        y_first = -(-self.view_y // step) * step
+        for value in range(y_first, self.view_y + self.grid_height * self.block + 1, step):
+            y = self.offset_y + (value - self.view_y) * scale
+            self.canvas.create_text(self.offset_x - 5, y, text=str(value), anchor=tk.E,
+                                   font=("Arial", 8), tags="grid")
+        
+        self.canvas.create_line(self.offset_x, self.offset_y, self.offset_x, bottom,
+                               fill="#000000", width=2, tags="grid")
+        self.canvas.create_line(self.offset_x, self.offset_y, right, self.offset_y,
+                               fill="#000000", width=2, tags="grid")
+        
+        self.canvas.create_text(right + 20, self.offset_y, text="X",
+                               font=("Arial", 12, "bold"), tags="grid")
+        self.canvas.create_text(self.offset_x, bottom + 20, text="Y",
+                               font=("Arial", 12, "bold"), tags="grid")
+        self.canvas.tag_lower("raster")
+    
+    def label_step(self) -> int:
+        # Шаг подписей 1, 2 или 5 * 10^k клеток, не меньше 100 пикселей
+        minimum = 100 * self.block / self.cell_size
+        power = 1
+        while True:
+            for factor in (1, 2, 5):
+                if factor * power >= minimum:
+                    return factor * power
+            power *= 10
+    
+    def render_raster(self):
+        # Весь растр - вывод в исходное изображение и одно копирование с
+        # увеличением. Разреженный растр выводится сериями клеток строки
+        # поверх залитого фоном изображения, плотный - одним вызовом put для
+        # всего изображения. Копирование заменяет пиксели целиком, иначе
+        # прозрачные пиксели источника оставили бы прежний цвет.
+        palette = self.palette
+        puts = 0
+        if len(self.raster_cells) * 8 < self.grid_width * self.grid_height:
+            self.raster_source.put(palette[0], to=(0, 0, self.grid_width, self.grid_height))
+            puts += 1
+            run = None
+            for (x, y), value in sorted(self.raster_cells.items(), key=lambda item: item[0][::-1]):
+                if run and run[1] == y and run[2] == x - 1 and run[3] == value:
+                    run[2] = x
+                    continue
+                if run:
+                    self.raster_source.put(palette[run[3]], to=(run[0], run[1], run[2] + 1, run[1] + 1))
+                    puts += 1
+                run = [x, y, x, value]
+            if run:
+                self.raster_source.put(palette[run[3]], to=(run[0], run[1], run[2] + 1, run[1] + 1))
+                puts += 1
+        else:
+            rows = ("{" + " ".join([palette[v] for v in row]) + "}"
+                    for row in self.raster_buffer.rows())
+            self.raster_source.put(" ".join(rows), to=(0, 0))
+            puts += 1
+        self.raster_image.tk.call(self.raster_image, "copy", self.raster_source,
+                                  "-zoom", self.cell_size, self.cell_size,
+                                  "-compositingrule", "set")
+        self.profiler.count("puts", puts)
+        self.profiler.count("full_renders")
+    
+    def update_raster(self, cells: Dict[Tuple[int, int], int]):
+        # Перерисовываются только клетки, значение которых изменилось. При
+        # большом числе изменений дешевле вывести весь буфер заново.
+        old = self.raster_cells
+        changed = [(cell, value) for cell, value in cells.items() if old.get(cell) != value]
+        changed += [(cell, 0) for cell in old if cell not in cells]
+        self.raster_cells = cells
+        self.profiler.count("cells", len(cells))
+        self.profiler.count("changed", len(changed))
+        if not changed:
+            return
+        
+        for cell, value in changed:
+            self.raster_buffer.plot([cell], value)
+        
+        if len(changed) > self.incremental_limit:
+            self.render_raster()
+            return
+        
+        size = self.cell_size
+        for (x, y), value in changed:
+            self.raster_image.put(self.palette[value],
+                                  to=(x * size, y * size, (x + 1) * size, (y + 1) * size))
+        self.profiler.count("puts", len(changed))
+    
+    def on_param_change(self, *args):
+        if self.live_var.get() or self.drag_handle is not None:
+            self.schedule_update()
+    
+    def schedule_update(self):
+        # События ввода и перемещения мыши, пришедшие за один кадр,
+        # объединяются в одно перестроение
+        if self.update_pending is None:
+            self.update_pending = self.root.after(self.frame_interval, self.live_update)
+    
+    def live_update(self):
+        self.update_pending = None
+        self.build_raster(incremental=True)
+    
+    def on_profiling_change(self):
+        self.profiler.set_profiling(self.cprofile_var.get())
+        self.profiler.set_memory_tracing(self.tracemalloc_var.get())
+    
+    def export_profile(self):
+        path = filedialog.asksaveasfilename(
+            title="Экспорт профиля", defaultextension=".json",
+            filetypes=[("JSON", "*.json"), ("Все файлы", "*.*")])
+        if not path:
+            return
+        try:
+            self.profiler.export(path)
+        except OSError as e:
+            messagebox.showerror("Ошибка", f"Не удалось сохранить профиль: {str(e)}")
+    
+    def schedule_info(self, algorithm, params, visible, execution_time, trace):
+        # Панель с пояснениями перестраивается, когда параметры перестают меняться
+        if self.info_pending is not None:
+            self.root.after_cancel(self.info_pending)
+        self.info_pending = self.root.after(self.info_delay, self.show_info,
+                                            algorithm, params, visible, execution_time, trace)
+    
+    def event_cell(self, event) -> Tuple[int, int]:
+        # Клетка плоскости под указателем мыши
+        px = math.floor(self.canvas.canvasx(event.x) - self.offset_x)
+        py = math.floor(self.canvas.canvasy(event.y) - self.offset_y)
+        return (self.view_x + px * self.block // self.cell_size,
+                self.view_y + py * self.block // self.cell_size)
+    
+    def visible_region(self) -> Tuple[int, int, int, int]:
+        return (self.view_x, self.view_y,
+                self.view_x + self.grid_width * self.block - 1,
+                self.view_y + self.grid_height * self.block - 1)
+    
+    def set_view(self, zoom_index: int, view_x: int, view_y: int):
+        zoom_index = max(0, min(len(self.zoom_levels) - 1, zoom_index))
+        if (zoom_index, view_x, view_y) == (self.zoom_index, self.view_x, self.view_y):
+            return
+        self.zoom_index = zoom_index
+        self.cell_size, self.block = self.zoom_levels[zoom_index]
+        self.grid_width = self.view_width // self.cell_size
+        self.grid_height = self.view_height // self.cell_size
+        self.view_x = view_x
+        self.view_y = view_y
+        # Сдвиги и прокрутка колеса за один кадр применяются разом
+        if self.view_pending is None:
+            self.view_pending = self.root.after(self.frame_interval, self.refresh_view)
+    
+    def refresh_view(self):
+        # Растеризуется и выводится только новая видимая область
+        self.view_pending = None
+        shown = self.raster_key is not None
+        self.raster_key = None
+        self.profiler.begin("view")
+        with self.profiler.phase("render"):
+            self.setup_raster_layer()
+            self.draw_grid()
+            self.update_scale_label()
+            self.root.update_idletasks()
+        if shown:
+            self.build_raster(incremental=True)
+    
+    def update_scale_label(self):
+        if self.block == 1:
+            text = f"1 клетка = {self.cell_size}×{self.cell_size} пикс."
+        else:
+            text = f"1 пиксель = {self.block}×{self.block} клеток (плотность)"
+        x_min, y_min, x_max, y_max = self.visible_region()
+        self.scale_label.configure(text=f"{text}\nx: {x_min}..{x_max}, y: {y_min}..{y_max}")
+    
+    def zoom_by(self, delta: int, px: int = None, py: int = None):
+        # Клетка под точкой (px, py) области растра остается на месте
+        if px is None:
+            px, py = self.view_width // 2, self.view_height // 2
+        x = self.view_x + px * self.block // self.cell_size
+        y = self.view_y + py * self.block // self.cell_size
+        index = max(0, min(len(self.zoom_levels) - 1, self.zoom_index + delta))
+        cell_size, block = self.zoom_levels[index]
+        self.set_view(index, x - px * block // cell_size, y - py * block // cell_size)
+    
+    def on_wheel(self, event):
+        zoom_in = getattr(event, "num", None) == 4 or getattr(event, "delta", 0) > 0
+        px = math.floor(self.canvas.canvasx(event.x) - self.offset_x)
+        py = math.floor(self.canvas.canvasy(event.y) - self.offset_y)
+        px = max(0, min(self.view_width - 1, px))
+        py = max(0, min(self.view_height - 1, py))
+        self.zoom_by(-1 if zoom_in else 1, px, py)
+    
+    def on_pan_start(self, event):
+        self.pan_start = (event.x, event.y, self.view_x, self.view_y)
+    
+    def on_pan(self, event):
+        if self.pan_start is None:
+            return
+        x0, y0, view_x, view_y = self.pan_start
+        self.set_view(self.zoom_index,
+                      view_x - (event.x - x0) * self.block // self.cell_size,
+                      view_y - (event.y - y0) * self.block // self.cell_size)
+    
+    def on_pan_end(self, event):
+        self.pan_start = None
+    
+    def fit_view(self):
+        # Наибольший масштаб, при котором примитив виден целиком с полями
+        try:
+            algorithm = self.algorithm_var.get()
+            params = self.read_params(algorithm)
+        except ValueError:
+            return
+        if algorithm == "bresenham_circle":
+            xc, yc, r = params
+            box = (xc - abs(r), yc - abs(r), xc + abs(r), yc + abs(r))
+        else:
+            x1, y1, x2, y2 = params
+            box = (min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+        width = box[2] - box[0] + 1
+        height = box[3] - box[1] + 1
+        
+        index = len(self.zoom_levels) - 1
+        for i, (cell_size, block) in enumerate(self.zoom_levels):
+            if (self.view_width // cell_size - 2) * block >= width and \
+               (self.view_height // cell_size - 2) * block >= height:
+                index = i
+                break
+        cell_size, block = self.zoom_levels[index]
+        columns = self.view_width // cell_size * block
+        rows = self.view_height // cell_size * block
+        self.set_view(index, (box[0] + box[2]) // 2 - columns // 2,
+                      (box[1] + box[3]) // 2 - rows // 2)
+    
+    def reset_view(self):
+        self.set_view(1, 0, 0)
+    
+    def on_drag_start(self, event):
+        # Перетаскивается ближайший конец отрезка; у окружности - центр,
+        # если нажатие рядом с ним, иначе радиус
+        try:
+            algorithm = self.algorithm_var.get()
+            params = self.read_params(algorithm)
+        except ValueError:
+            return
+        x, y = self.event_cell(event)
+        
+        if algorithm == "bresenham_circle":
+            xc, yc, _ = params
+            near = max(1, 5 * self.block // self.cell_size)
+            self.drag_handle = "center" if max(abs(x - xc), abs(y - yc)) <= near else "radius"
+        else:
+            x1, y1, x2, y2 = params
+            near_start = (x - x1) ** 2 + (y - y1) ** 2 <= (x - x2) ** 2 + (y - y2) ** 2
+            self.drag_handle = "start" if near_start else "end"
+        self.on_drag(event)
+    
+    def on_drag(self, event):
+        if self.drag_handle is None:
+            return
+        x, y = self.event_cell(event)
+        
+        if self.drag_handle == "start":
+            self.x1_var.set(str(x))
+            self.y1_var.set(str(y))
+        elif self.drag_handle == "end":
+            self.x2_var.set(str(x))
+            self.y2_var.set(str(y))
+        elif self.drag_handle == "center":
+            self.xc_var.set(str(x))
+            self.yc_var.set(str(y))
+        else:
+            try:
+                xc, yc = int(self.xc_var.get()), int(self.yc_var.get())
+            except ValueError:
+                return
+            self.r_var.set(str(round(((x - xc) ** 2 + (y - yc) ** 2) ** 0.5)))
+    
+    def on_drag_end(self, event):
+        if self.drag_handle is None:
+            return
+        self.drag_handle = None
+        if self.update_pending is not None:
+            self.root.after_cancel(self.update_pending)
+            self.update_pending = None
+        if self.info_pending is not None:
+            self.root.after_cancel(self.info_pending)
+            self.info_pending = None
+        self.build_raster()
+    
+    def read_params(self, algorithm: str) -> Tuple[int, ...]:
+        if algorithm == "bresenham_circle":
+            return int(self.xc_var.get()), int(self.yc_var.get()), int(self.r_var.get())
+        return (int(self.x1_var.get()), int(self.y1_var.get()),
+                int(self.x2_var.get()), int(self.y2_var.get()))
+    
+    def build_raster(self, incremental: bool = False):
+        # incremental=True - обновление по ходу изменения параметров: пропуск,
+        # если параметры не изменились, без сообщений об ошибках ввода и с
+        # отложенным обновлением информационной панели
+        profiler = self.profiler
+        profiler.begin("build")
+        try:
+            with profiler.phase("parse"):
+                algorithm = self.algorithm_var.get()
+                params = self.read_params(algorithm)
+            if incremental and (algorithm, params) == self.raster_key:
+                profiler.cancel()
+                return
+            
+            # Растеризуется только видимая часть примитива
+            viewport = self.visible_region()
+            view_x, view_y, block = self.view_x, self.view_y, self.block
+            # Переменные алгоритма для пояснений записываются при самой
+            # растеризации; при показе плотности шагов нет
+            trace = RasterTrace(self.trace_limit) if block == 1 else None
+            
+            if block > 1:
+                # Мелкий масштаб: вместо точек - их число в каждом блоке.
+                # Отсечение здесь неотделимо от подсчета.
+                with profiler.phase("rasterize"):
+                    if algorithm == "bresenham_circle":
+                        counts = self.algorithms.circle_density(*params, viewport, block)
+                    else:
+                        counts = self.algorithms.line_density(algorithm, *params, viewport, block)
+            elif algorithm == "bresenham_circle":
+                with profiler.phase("clip"):
+                    ranges = self.algorithms.clip_circle(*params, viewport)
+                with profiler.phase("rasterize"):
+                    points = self.algorithms.clipped_circle(*params, viewport, ranges, trace)
+            else:
+                with profiler.phase("clip"):
+                    steps = self.algorithms.clip_line(algorithm, *params, viewport)
+                with profiler.phase("rasterize"):
+                    if steps is not None:
+                        points = self.algorithms.line_range(algorithm, *params, *steps, trace)
+                    else:
+                        points = []
+                        trace.start_line(algorithm, *params)
+            
+            phases = profiler.frame["phases"]
+            execution_time = (phases.get("clip", 0.0) + phases["rasterize"]) * 1000000  # в микросекундах
+            
+            with profiler.phase("render"):
+                if block > 1:
+                    visible = sum(counts.values())
+                    cells = {cell: 4 + min(251, (count * 251 + block - 1) // block)
+                             for cell, count in counts.items()}
+                else:
+                    visible = len(points)
+                    cells = {(x - view_x, y - view_y): 1 for x, y in points}
+                
+                if algorithm != "bresenham_circle":
+                    x1, y1, x2, y2 = params
+                    for x, y, value in ((x1, y1, 2), (x2, y2, 3)):
+                        cell = ((x - view_x) // block, (y - view_y) // block)
+                        if 0 <= cell[0] < self.grid_width and 0 <= cell[1] < self.grid_height:
+                            cells[cell] = value
+                
+                self.update_raster(cells)
+                # Холст перерисовывается при простое Tk; вызов здесь включает
+                # саму отрисовку в замер
+                self.root.update_idletasks()
+            profiler.count("pixels", visible)
+            profiler.count("items", len(self.canvas.find_all()))
+            self.raster_key = (algorithm, params)
+            
+            if incremental:
+                self.schedule_info(algorithm, params, visible, execution_time, trace)
+            else:
+                self.show_info(algorithm, params, visible, execution_time, trace)
+            
+        except ValueError as e:
+            profiler.cancel()
+            if not incremental:
+                messagebox.showerror("Ошибка", f"Неверные параметры: {str(e)}\nВведите целые числа.")
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Произошла ошибка: {str(e)}")
+    
+    def show_info(self, algorithm: str, params: Tuple[int, ...],
+                  visible: int, execution_time: float, trace: Optional[RasterTrace] = None):
+        self.info_pending = None
+        with self.profiler.phase("info"):
+            self.write_info(algorithm, params, visible, execution_time, trace)
+        
+        self.info_text.insert(tk.END, f"\n--- Профиль ---\n")
+        for line in self.profiler.report():
+            self.info_text.insert(tk.END, line + "\n")
+    
+    def insert_trace_header(self, trace: RasterTrace, title: str):
+        if not len(trace):
+            self.info_text.insert(tk.END, "Видимых шагов нет\n")
+            return
+        self.info_text.insert(tk.END, title)
+        if len(trace) < trace.total:
+            self.info_text.insert(tk.END, f"(первые {len(trace)} из {trace.total} выполненных шагов)\n")
+    
+    def write_info(self, algorithm: str, params: Tuple[int, ...],
+                   visible: int, execution_time: float, trace: Optional[RasterTrace]):
+        self.info_text.delete(1.0, tk.END)
+        
+        if algorithm == "bresenham_circle":
+            xc, yc, r = params
+            self.info_text.insert(tk.END, f"Алгоритм: Брезенхем (окружность)\n")
+            self.info_text.insert(tk.END, f"Параметры: центр ({xc}, {yc}), радиус {r}\n")
+        else:
+            x1, y1, x2, y2 = params
+            self.info_text.insert(tk.END, f"Алгоритм: {self.algorithm_names[algorithm]}\n")
+            self.info_text.insert(tk.END, f"Параметры: от ({x1}, {y1}) до ({x2}, {y2})\n")
+        
+        if algorithm != "bresenham_circle":
+            total = max(abs(x2 - x1), abs(y2 - y1)) + 1
+            self.info_text.insert(tk.END, f"\nКоличество точек: {total}\n")
+            self.info_text.insert(tk.END, f"Видимых точек: {visible}\n")
+        else:
+            self.info_text.insert(tk.END, f"\nВидимых точек: {visible}\n")
+        if self.block > 1:
+            self.info_text.insert(tk.END, f"Показана плотность: 1 пиксель = {self.block}×{self.block} клеток\n")
+        self.info_text.insert(tk.END, f"Время выполнения: {execution_time:.2f} мкс ({execution_time/1000:.4f} мс)\n")
+        
+        self.info_text.insert(tk.END, f"\n--- Пример вычислений ---\n")
+        
+        # Значения берутся из записи, сделанной во время растеризации
+        if trace is None:
+            self.info_text.insert(tk.END, "При показе плотности шаги алгоритма не записываются\n")
+        elif algorithm == "step" or algorithm == "dda":
+            values = trace.values
+            dx, dy, steps = values["dx"], values["dy"], values["steps"]
+            
+            self.info_text.insert(tk.END, f"dx = {x2} - {x1} = {dx}\n")
+            self.info_text.insert(tk.END, f"dy = {y2} - {y1} = {dy}\n")
+            self.info_text.insert(tk.END, f"steps = max(|{dx}|, |{dy}|) = {steps}\n")
+            
+            if steps > 0:
+                self.info_text.insert(tk.END, f"x_increment = {dx}/{steps} = {values['x_increment']:.4f}\n")
+                self.info_text.insert(tk.END, f"y_increment = {dy}/{steps} = {values['y_increment']:.4f}\n\n")
+                self.insert_trace_header(trace, "Первые точки:\n")
+                for row in trace.rows():
+                    self.info_text.insert(tk.END,
+                        f"Шаг {row['k']}: x={row['x']:.2f}, y={row['y']:.2f} → ({row['px']}, {row['py']})\n")
+        
+        elif algorithm == "bresenham_line":
+            values = trace.values
+            dx, dy = values["dx"], values["dy"]
+            
+            self.info_text.insert(tk.END, f"dx = |{x2} - {x1}| = {dx}\n")
+            self.info_text.insert(tk.END, f"dy = |{y2} - {y1}| = {dy}\n")
+            self.info_text.insert(tk.END, f"Начальная ошибка: err = dx - dy = {dx} - {dy} = {values['err0']}\n\n")
+            
+            self.insert_trace_header(trace, "Первые итерации:\n")
+            for row in trace.rows():
+                self.info_text.insert(tk.END, f"Шаг {row['k']}: ({row['x']}, {row['y']}), err={row['err']}\n")
+        
+        elif algorithm == "bresenham_circle":
+            self.info_text.insert(tk.END, f"Центр: ({xc}, {yc})\n")
+            self.info_text.insert(tk.END, f"Радиус: {r}\n")
+            self.info_text.insert(tk.END, f"Начальное значение параметра решения: d = 3 - 2*r = 3 - 2*{r} = {trace.values['d0']}\n\n")
+            
+            self.insert_trace_header(trace, "Первые итерации:\n")
+            for row in trace.rows():
+                x, y, d = row["x"], row["y"], row["d"]
+                self.info_text.insert(tk.END, f"Шаг {x}: x={x}, y={y}, d={d}\n")
+                self.info_text.insert(tk.END, f"  → 8 точек: ({xc}±{x}, {yc}±{y}), ({xc}±{y}, {yc}±{x})\n")
+                if d > 0:
+                    self.info_text.insert(tk.END, f"  d > 0: y--, d = d + 4*(x-y) + 10\n")
+                else:
+                    self.info_text.insert(tk.END, f"  d ≤ 0: d = d + 4*x + 6\n")
+        
+        self.info_text.insert(tk.END, f"\n{'='*40}\n")
+        self.info_text.insert(tk.END, "Легенда:\n")
+        self.info_text.insert(tk.END, "• Синие клетки - растеризованные точки\n")
+        if algorithm != "bresenham_circle":
+            self.info_text.insert(tk.END, "• Зеленая клетка - начальная точка\n")
+            self.info_text.insert(tk.END, "• Красная клетка - конечная точка\n")
+        
+
+
+def run():
+    root = tk.Tk()
+    app = RasterVisualizerApp(root)
+    root.mainloop()